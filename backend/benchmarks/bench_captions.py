@@ -0,0 +1,170 @@
+"""Compare the streaming caption parser with the old whole-file VTT/SRT parsers.
+
+Usage (from the backend directory):
+    python benchmarks/bench_captions.py [--sizes 10000 100000 500000]
+
+Each size is a number of cues, written as a YouTube-style rolling WebVTT
+file (every cue repeats the previous line, with inline word timing tags)
+and as a plain SRT file. Cue settings are left out of the VTT so the old
+parser, which can't read them, still sees every cue.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.caption_parser import parse_caption_file
+from services.search_index import TranscriptIndex
+from utils import codec
+from utils.word_timing import interpolate_words
+
+
+WORDS = ("the", "speech", "search", "video", "lecture", "eigenvalue", "matrix", "model",
+         "audio", "transcript", "keyword", "signal", "network", "question", "answer")
+
+
+def timestamp(seconds: float, separator: str = ".") -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}".replace(".", separator)
+
+
+def write_rolling_vtt(path: Path, cues: int):
+    rng = random.Random(0)
+    previous = ""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\nKind: captions\nLanguage: en\n\n")
+        start = 0.0
+        for _ in range(cues):
+            line_words = [rng.choice(WORDS) for _ in range(rng.randint(4, 9))]
+            tagged = line_words[0] + "".join(
+                f"<{timestamp(start + 0.3 * (i + 1))}><c> {word}</c>" for i, word in enumerate(line_words[1:])
+            )
+            end = start + 0.3 * len(line_words)
+            # The live cue: previous line carried over plus the new, word-timed line
+            carried = f"{previous}\n" if previous else ""
+            f.write(f"{timestamp(start)} --> {timestamp(end)}\n{carried}{tagged}\n\n")
+            # The 10ms "settled" cue that repeats both lines without tags
+            plain = " ".join(line_words)
+            f.write(f"{timestamp(end)} --> {timestamp(end + 0.01)}\n{carried}{plain}\n\n")
+            previous = plain
+            start = end + 0.01
+
+
+def write_srt(path: Path, cues: int):
+    rng = random.Random(1)
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(cues):
+            start = index * 2.5
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+            f.write(f"{index + 1}\n{timestamp(start, ',')} --> {timestamp(start + 2.4, ',')}\n{text}\n\n")
+
+
+# The parsers YouTubeService used before the streaming parser, kept as the baseline
+
+def legacy_time_to_seconds(t: str) -> float:
+    parts = [float(p.replace(',', '.')) for p in t.split(':')]
+    if len(parts) == 3:
+        return parts[0] * 3600 + parts[1] * 60 + parts[2]
+    elif len(parts) == 2:
+        return parts[0] * 60 + parts[1]
+    return 0.0
+
+
+def legacy_parse_vtt(vtt_text: str):
+    segments = []
+    lines = vtt_text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if '-->' in line:
+            try:
+                times = line.split('-->')
+                start = legacy_time_to_seconds(times[0].strip())
+                end = legacy_time_to_seconds(times[1].strip())
+                i += 1
+                texts = []
+                while i < len(lines) and lines[i].strip() != '':
+                    texts.append(lines[i].strip())
+                    i += 1
+                text = ' '.join(texts).strip()
+                segments.append({'start': start, 'end': end, 'text': text,
+                                 'words': interpolate_words(start, end, text)})
+            except Exception:
+                i += 1
+        else:
+            i += 1
+    return segments
+
+
+def legacy_parse_srt(srt_text: str):
+    segments = []
+    for block in srt_text.split('\n\n'):
+        lines = [l.strip() for l in block.splitlines() if l.strip()]
+        if len(lines) >= 2:
+            if '-->' in lines[0]:
+                time_line, text_lines = lines[0], lines[1:]
+            else:
+                time_line, text_lines = lines[1], lines[2:]
+            try:
+                times = time_line.split('-->')
+                start = legacy_time_to_seconds(times[0].strip())
+                end = legacy_time_to_seconds(times[1].strip())
+                text = ' '.join(text_lines).strip()
+                segments.append({'start': start, 'end': end, 'text': text,
+                                 'words': interpolate_words(start, end, text)})
+            except Exception:
+                continue
+    return segments
+
+
+def measure(fn):
+    """(seconds, peak traced memory in bytes, result); timed without tracing, which slows Python down"""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def report(label: str, elapsed: float, peak: int, segments):
+    index_size = len(codec.dumps(TranscriptIndex.build(segments).to_dict()))
+    print(f"  {label:<12}{elapsed * 1000:>10.0f}ms{peak / 1024 / 1024:>10.1f}MB"
+          f"{len(segments):>12,}{index_size / 1024 / 1024:>10.1f}MB")
+
+
+def run(cues: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        vtt_path = Path(tmp) / "captions.en.vtt"
+        srt_path = Path(tmp) / "captions.en.srt"
+        write_rolling_vtt(vtt_path, cues)
+        write_srt(srt_path, cues)
+
+        print(f"\n{cues:,} cues (vtt {vtt_path.stat().st_size / 1024 / 1024:.1f}MB, "
+              f"srt {srt_path.stat().st_size / 1024 / 1024:.1f}MB)")
+        print(f"  {'parser':<12}{'time':>12}{'peak mem':>12}{'segments':>12}{'index':>12}")
+        report("vtt old", *measure(lambda: legacy_parse_vtt(vtt_path.read_text(encoding="utf-8"))))
+        report("vtt stream", *measure(lambda: list(parse_caption_file(str(vtt_path)))))
+        report("srt old", *measure(lambda: legacy_parse_srt(srt_path.read_text(encoding="utf-8"))))
+        report("srt stream", *measure(lambda: list(parse_caption_file(str(srt_path)))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    args = parser.parse_args()
+    for count in args.sizes:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare stdlib json, orjson and the columnar .seg format on synthetic transcripts.
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import codec
+from utils.transcript_store import ColumnarTranscript, write_columnar
+
+
+def make_transcript(count: int):
+    return [
+        {"start": round(i * 2.5, 3), "end": round(i * 2.5 + 2.4, 3),
+         "text": f"segment {i} of the synthetic transcript with a few ordinary words"}
+        for i in range(count)
+    ]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def run(count: int):
+    transcript = make_transcript(count)
+
+    json_encode, json_data = timed(lambda: json.dumps(transcript))
+    json_decode, _ = timed(lambda: json.loads(json_data))
+    orjson_encode, orjson_data = timed(lambda: codec.dumps(transcript))
+    orjson_decode, _ = timed(lambda: codec.loads(orjson_data))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seg_path = Path(tmp) / "bench.seg"
+        seg_write, _ = timed(lambda: write_columnar(seg_path, transcript))
+        seg_size = seg_path.stat().st_size
+        seg_open, columnar = timed(lambda: ColumnarTranscript(seg_path))
+        seg_read, _ = timed(columnar.to_list)
+        columnar.close()
+
+    print(f"\n{count:,} segments")
+    print(f"  {'format':<10}{'encode/write':>14}{'decode/read':>14}{'size':>12}")
+    print(f"  {'json':<10}{json_encode * 1000:>12.1f}ms{json_decode * 1000:>12.1f}ms"
+          f"{len(json_data) / 1024 / 1024:>10.1f}MB")
+    print(f"  {'orjson':<10}{orjson_encode * 1000:>12.1f}ms{orjson_decode * 1000:>12.1f}ms"
+          f"{len(orjson_data) / 1024 / 1024:>10.1f}MB")
+    print(f"  {'seg':<10}{seg_write * 1000:>12.1f}ms{seg_read * 1000:>12.1f}ms"
+          f"{seg_size / 1024 / 1024:>10.1f}MB  (open {seg_open * 1000:.2f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    for count in args.sizes:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
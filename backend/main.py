@@ -1,20 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, AsyncIterator
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import os
+import time
+import uuid
+import aiofiles
 from dotenv import load_dotenv
 
 from services.youtube_service import YouTubeService
 from services.transcription_service import TranscriptionService
+from services.transcription_backends import BACKENDS
 from services.search_service import SearchService
+from services.search_index import TranscriptIndex
 from services.summarization_service import SummarizationService
 from utils.cache import CacheManager
+from utils.codec import dumps
+from utils.corpus_index import CorpusIndex
+from utils.job_queue import JobQueue, Job, TERMINAL_STATUSES
+from utils.single_flight import SingleFlight
+from utils.transcript_store import time_window
 
 load_dotenv()
 
-app = FastAPI(title="SpeechFindr API", version="1.0.0")
+# orjson renders responses far faster than the stdlib encoder on long transcripts
+app = FastAPI(title="SpeechFindr API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -25,16 +40,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Seconds before a cached fetch is revalidated against YouTube (0 = never)
+FETCH_CACHE_TTL = float(os.getenv("FETCH_CACHE_TTL", "0"))
+# Probe for creator captions first and download audio only when a video has none
+CAPTIONS_FIRST = os.getenv("CAPTIONS_FIRST", "1") == "1"
+
+# Uploads are streamed to disk in blocks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 # Initialize services
 youtube_service = YouTubeService()
 transcription_service = TranscriptionService()
 search_service = SearchService()
 summarization_service = SummarizationService()
 cache_manager = CacheManager()
+job_queue = JobQueue()
+single_flight = SingleFlight()
+corpus_index = CorpusIndex()
+
+# FTS5 indexing of a long transcript takes a while: corpus updates run off the event loop, one at a time
+corpus_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="corpus-index")
+
+
+def queue_corpus_update(video_id: str, transcript: Optional[List[dict]], version: Optional[str]):
+    """Cache listener: apply a stored (or dropped) transcript to the corpus index in the background"""
+    def update():
+        try:
+            corpus_index.on_transcript_changed(video_id, transcript, version)
+        except Exception as e:
+            print(f"Corpus index update failed for {video_id}: {str(e)}")
+    corpus_executor.submit(update)
+
+
+# Every transcript the cache stores (or drops) is reflected in the corpus index
+cache_manager.add_transcript_listener(queue_corpus_update)
+
+
+def drop_search_index(video_id: str, transcript: Optional[List[dict]], version: Optional[str]):
+    """Cache listener: a deleted transcript takes its in-memory search index with it"""
+    if transcript is None:
+        search_service.drop_index(video_id)
+
+
+def drop_transcription_derivatives(audio_hash: str, key: Optional[str]):
+    """Transcription cache listener: drop checkpoints (and, for the whole audio, its PCM decode)"""
+    if key is not None:
+        transcription_service.checkpoints.delete(key)
+    else:
+        transcription_service.checkpoints.delete_audio(audio_hash)
+        transcription_service.pcm_store.delete(audio_hash)
+
+
+cache_manager.add_transcript_listener(drop_search_index)
+transcription_service.transcript_cache.add_invalidation_listener(drop_transcription_derivatives)
+
+# Streaming clients following a transcription in progress: video_id -> queues of chunk records
+partial_subscribers: Dict[str, List[asyncio.Queue]] = {}
+# Segments per event when streaming a transcript that is already complete
+STREAM_BATCH_SIZE = 500
+
+
+def publish_partial_chunk(video_id: str, record: dict):
+    for queue in partial_subscribers.get(video_id, ()):
+        queue.put_nowait(record)
+
+
+cache_manager.add_partial_listener(publish_partial_chunk)
 
 
 class YouTubeRequest(BaseModel):
     url: str
+    refresh: bool = False
+    backend: Optional[str] = None  # transcription backend for job submissions
 
 
 class SummarizeRequest(BaseModel):
@@ -43,6 +120,495 @@ class SummarizeRequest(BaseModel):
     segments: List[dict]
 
 
+async def fetch_video(url: str, video_id: str, refresh: bool = False) -> dict:
+    """Fetch a video's transcript source, skipping the network when the fetch cache has it.
+    
+    In caption-first mode a video with creator captions is served from them
+    and its audio is only downloaded if something needs it (ensure_audio).
+    Concurrent fetches of one video share a single download.
+    """
+    if not refresh:
+        cached = await get_cached_fetch(url, video_id)
+        if cached:
+            return cached
+    
+    return await single_flight.do(("fetch", video_id), lambda: download_video(url, video_id))
+
+
+async def get_cached_fetch(url: str, video_id: str) -> Optional[dict]:
+    """Return recorded fetch metadata if what it recorded (captions or audio) is still on disk"""
+    metadata = cache_manager.get_metadata(video_id)
+    if not metadata:
+        return None
+    
+    audio_path = cache_manager.get_audio_path(video_id)
+    if metadata.get("has_creator_captions"):
+        # Captioned videos are served from the stored captions; audio is optional
+        if not cache_manager.has_transcript(video_id):
+            return None
+    elif not audio_path or not os.path.exists(audio_path):
+        return None
+    
+    # Optional revalidation: after the TTL, check the video is still the same
+    if FETCH_CACHE_TTL and time.time() - metadata.get("validated_at", 0) > FETCH_CACHE_TTL:
+        try:
+            info = await youtube_service.probe_info(url)
+        except Exception as e:
+            # Serve the cached fetch rather than fail when YouTube is unreachable
+            print(f"Revalidation failed for {video_id}, serving cached fetch: {str(e)}")
+            info = None
+        if info is not None:
+            if info.get("duration") != metadata.get("duration"):
+                return None
+            metadata["title"] = info.get("title", metadata.get("title"))
+            metadata["validated_at"] = time.time()
+            cache_manager.save_metadata(video_id, metadata)
+    
+    return {**metadata, "audio_path": audio_path, "cached": True}
+
+
+async def download_video(url: str, video_id: str) -> dict:
+    """Fetch creator captions only (caption-first mode), falling back to the audio"""
+    if CAPTIONS_FIRST:
+        result = await youtube_service.fetch_captions(url, video_id)
+        if await save_captions(video_id, result.get("captions")):
+            return await record_fetch(url, video_id, result, True, cache_manager.get_audio_path(video_id))
+    return await download_audio(url, video_id)
+
+
+async def download_audio(url: str, video_id: str, store_captions: bool = True) -> dict:
+    """Download audio (and creator captions) and record them in the metadata cache.
+    
+    store_captions=False leaves the stored transcript alone (a lazy audio
+    download: the caller decides what to transcribe).
+    """
+    result = await youtube_service.fetch_and_extract_audio(url, video_id)
+    if store_captions:
+        has_captions = await save_captions(video_id, result.get("captions"))
+    else:
+        has_captions = bool((cache_manager.get_metadata(video_id) or {}).get("has_creator_captions"))
+    return await record_fetch(url, video_id, result, has_captions, result["audio_path"])
+
+
+async def save_captions(video_id: str, captions: Optional[List[dict]]) -> bool:
+    """Save creator captions into the cache as the transcript; returns whether they were stored"""
+    if not captions:
+        return False
+    try:
+        await store_transcript(video_id, captions)
+        return True
+    except Exception as e:
+        print(f"Could not store creator captions for {video_id}: {str(e)}")
+        return False
+
+
+async def record_fetch(url: str, video_id: str, result: dict, has_captions: bool,
+                       audio_path: Optional[str]) -> dict:
+    """Record a fetch in the metadata cache"""
+    audio_hash = None
+    if audio_path:
+        loop = asyncio.get_event_loop()
+        audio_hash = await loop.run_in_executor(
+            None, transcription_service.transcript_cache.audio_hash, audio_path
+        )
+    now = time.time()
+    metadata = {
+        "video_id": video_id,
+        "url": url,
+        "title": result.get("title"),
+        "duration": result.get("duration"),
+        "has_creator_captions": has_captions,
+        "audio_path": audio_path,
+        "audio_sha256": audio_hash,
+        "fetched_at": now,
+        "validated_at": now
+    }
+    cache_manager.save_metadata(video_id, metadata)
+    return {**metadata, "cached": False}
+
+
+async def ensure_audio(video_id: str) -> str:
+    """Path of a video's audio, downloading it on first need (caption-first fetches skip it)"""
+    audio_path = cache_manager.get_audio_path(video_id)
+    if audio_path and os.path.exists(audio_path):
+        return audio_path
+    
+    metadata = cache_manager.get_metadata(video_id)
+    if not metadata or not metadata.get("url"):
+        raise HTTPException(status_code=404, detail="Audio file not found. Please fetch the video first.")
+    result = await single_flight.do(
+        ("audio", video_id),
+        lambda: download_audio(metadata["url"], video_id, store_captions=False)
+    )
+    return result["audio_path"]
+
+
+async def extract_audio(video_path: str, video_id: str) -> str:
+    """Extract audio from an uploaded file, coalescing concurrent extractions"""
+    return await single_flight.do(
+        ("extract", video_id), lambda: youtube_service.extract_audio_from_file(video_path, video_id)
+    )
+
+
+def check_backend(backend: Optional[str]):
+    """Reject unknown transcription backend names with a 400"""
+    if backend is not None and backend not in BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown transcription backend '{backend}' (choose from {', '.join(BACKENDS)})"
+        )
+
+
+async def transcribe_audio(video_id: str, audio_path: str, backend: Optional[str] = None) -> List[dict]:
+    """Transcribe a video's audio; concurrent requests share one transcription.
+    
+    Chunks of a long recording are saved to the video's partial transcript
+    as they finish, so they can be streamed before the whole file is done.
+    """
+    def save_chunk(chunk: dict, segments: List[dict], total_chunks: int):
+        cache_manager.save_partial_chunk(video_id, chunk, segments, total_chunks)
+    
+    # None and the default backend's name are the same transcription
+    backend = backend or transcription_service.default_backend
+    return await single_flight.do(
+        ("transcribe", video_id, backend),
+        lambda: transcription_service.transcribe_with_timestamps(audio_path, backend=backend, on_chunk=save_chunk)
+    )
+
+
+async def transcribe_video(video_id: str, backend: Optional[str] = None) -> Tuple[List[dict], Optional[dict]]:
+    """Transcribe a video (fetching its audio if needed) and store the transcript unless chunks failed.
+    
+    Returns (transcript, chunk report or None); concurrent calls share one run.
+    """
+    async def run():
+        audio_path = await ensure_audio(video_id)
+        transcript = await transcribe_audio(video_id, audio_path, backend)
+        
+        # Chunks that failed every retry leave gaps; don't persist an incomplete transcript
+        report = transcription_service.get_chunk_report(audio_path)
+        if not report or not report["failed"]:
+            await store_transcript(video_id, transcript)
+        return transcript, report
+    
+    backend = backend or transcription_service.default_backend
+    return await single_flight.do(("transcribe_video", video_id, backend), run)
+
+
+async def follow_transcription(video_id: str, backend: Optional[str] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """Start (or join) a video's transcription and yield its progress.
+    
+    Yields ("chunk", record) for every chunk of this run saved to the partial
+    transcript (those saved earlier first), ("keepalive", {}) while waiting,
+    then ("done", {"transcript", "report"}) or ("error", {"detail"}).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    partial_subscribers.setdefault(video_id, []).append(queue)
+    task = asyncio.ensure_future(transcribe_video(video_id, backend))
+    getter = None
+    try:
+        # Chunks are tagged with their run (cache key): records left by earlier runs,
+        # other backends or chunk plans must not pass for this one's
+        try:
+            audio_path = await ensure_audio(video_id)
+            run = await asyncio.get_event_loop().run_in_executor(
+                None, transcription_service.cache_key, audio_path, backend
+            )
+        except Exception:
+            run = None  # the transcription fails the same way; its error is reported below
+        
+        sent = set()
+        for record in cache_manager.get_partial_chunks(video_id, run):
+            sent.add(record["chunk"])
+            yield "chunk", record
+        
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, task}, timeout=15, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                record = getter.result()
+            elif task in done:
+                break
+            else:
+                yield "keepalive", {}
+                continue
+            if record.get("run") == run and record["chunk"] not in sent:
+                sent.add(record["chunk"])
+                yield "chunk", record
+        
+        try:
+            transcript, report = task.result()
+        except HTTPException as e:
+            yield "error", {"detail": e.detail}
+            return
+        except Exception as e:
+            yield "error", {"detail": str(e)}
+            return
+        yield "done", {"transcript": transcript, "report": report}
+    finally:
+        if getter is not None and not getter.done():
+            getter.cancel()
+        if not task.done():
+            # The client left; the transcription carries on, just mark its outcome as seen
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        subscribers = partial_subscribers.get(video_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            partial_subscribers.pop(video_id, None)
+
+
+def uncovered_segments(transcript, ranges: List[Tuple[float, float]]) -> List[dict]:
+    """Segments outside the (start, end) ranges of chunks already streamed"""
+    return [
+        segment for segment in transcript
+        if not any(start <= (segment["start"] + segment["end"]) / 2 <= end for start, end in ranges)
+    ]
+
+
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+async def store_transcript(video_id: str, transcript: List[dict]):
+    """Persist a freshly produced transcript and build its search index (in a worker thread)"""
+    def persist() -> TranscriptIndex:
+        cache_manager.save_transcript(video_id, transcript)
+        index = search_service.build_index(transcript)
+        cache_manager.save_index(video_id, index.to_dict())
+        return index
+    
+    index = await asyncio.get_event_loop().run_in_executor(None, persist)
+    search_service.cache_index(video_id, index)
+
+
+def sync_corpus_index() -> int:
+    """Bring the corpus index in line with the transcript cache; returns videos (re)indexed"""
+    cached_ids = set()
+    indexed = 0
+    for video_id in cache_manager.list_transcripts():
+        cached_ids.add(video_id)
+        transcript = cache_manager.open_transcript(video_id)
+        if transcript is None:
+            continue
+        try:
+            etag = cache_manager.transcript_etag(video_id)
+            if corpus_index.version(video_id) != etag:
+                corpus_index.add_transcript(video_id, transcript, etag)
+                indexed += 1
+        finally:
+            transcript.close()
+    
+    for video_id in corpus_index.video_ids():
+        if video_id not in cached_ids:
+            corpus_index.remove_transcript(video_id)
+    return indexed
+
+
+async def get_search_index(video_id: str, transcript: List[dict]) -> TranscriptIndex:
+    """Get the search index for a transcript: memory, then disk, then build it once.
+    
+    Loading or building a large index takes a while, so it happens in a worker thread.
+    """
+    index = search_service.get_cached_index(video_id)
+    if index is not None and index.segment_count == len(transcript):
+        return index
+    
+    def load() -> TranscriptIndex:
+        index = TranscriptIndex.from_dict(cache_manager.get_index(video_id))
+        if index is None or index.segment_count != len(transcript):
+            index = search_service.build_index(transcript)
+            cache_manager.save_index(video_id, index.to_dict())
+        else:
+            index.prepare()
+        return index
+    
+    index = await asyncio.get_event_loop().run_in_executor(None, load)
+    search_service.cache_index(video_id, index)
+    return index
+
+
+async def save_upload(file: UploadFile) -> dict:
+    """Stream an uploaded video to the audio cache in fixed-size chunks.
+    
+    The upload is hashed as it is written, so memory use stays constant no
+    matter how large the file is. The video_id is derived from the content
+    hash, so re-uploading a known recording maps onto its existing audio,
+    transcript and index.
+    """
+    # Use portable path
+    backend_dir = Path(__file__).parent
+    cache_audio_dir = backend_dir / "cache" / "audio"
+    cache_audio_dir.mkdir(parents=True, exist_ok=True)
+    extension = file.filename.split('.')[-1]
+    
+    # The content hash (and so the video_id) is only known at the end
+    staging_id = f"upload_tmp_{uuid.uuid4().hex[:12]}"
+    temp_path = cache_audio_dir / f"{staging_id}.{extension}"
+    
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    sha256 = digest.hexdigest()
+    video_id = f"upload_{sha256[:16]}"
+    
+    existing_audio = cache_manager.get_audio_path(video_id)
+    if existing_audio:
+        # Same content as an earlier upload: reuse its audio, transcript and index
+        os.remove(temp_path)
+        return {
+            "video_id": video_id,
+            "video_path": None,
+            "audio_path": existing_audio,
+            "sha256": sha256,
+            "duplicate": True
+        }
+    
+    video_path = cache_audio_dir / f"{video_id}.{extension}"
+    os.replace(temp_path, video_path)
+    
+    return {
+        "video_id": video_id,
+        "video_path": str(video_path),
+        "audio_path": None,
+        "sha256": sha256,
+        "duplicate": False
+    }
+
+
+async def transcribe_and_index(job: Job, video_id: str, audio_path: str) -> int:
+    """Shared tail of the job pipelines: transcribe, then build the search index"""
+    await job.set_stage("transcribe", 0.5)
+    transcript = await transcribe_audio(video_id, audio_path, job.payload.get("backend"))
+    
+    report = transcription_service.get_chunk_report(audio_path)
+    if report and report["failed"]:
+        raise RuntimeError(f"{len(report['failed'])} of {report['total_chunks']} chunks failed to transcribe")
+    
+    await job.set_stage("index", 0.9)
+    await store_transcript(video_id, transcript)
+    return len(transcript)
+
+
+async def run_youtube_job(job: Job) -> dict:
+    """Job pipeline for a YouTube URL: fetch + extract audio, transcribe, index"""
+    url = job.payload["url"]
+    video_id = job.payload["video_id"]
+    
+    await job.set_stage("fetch", 0.0)
+    result = await fetch_video(url, video_id)
+    
+    if result["has_creator_captions"]:
+        # Creator captions were stored (and indexed) as the transcript during the fetch
+        transcript = cache_manager.open_transcript(video_id)
+        if transcript is None:
+            segment_count = 0
+        else:
+            with transcript:
+                segment_count = len(transcript)
+    else:
+        segment_count = await transcribe_and_index(job, video_id, result["audio_path"])
+    
+    return {
+        "video_id": video_id,
+        "title": result.get("title"),
+        "duration": result.get("duration"),
+        "url": url,
+        "has_creator_captions": result["has_creator_captions"],
+        "segments": segment_count
+    }
+
+
+async def run_upload_job(job: Job) -> dict:
+    """Job pipeline for an uploaded file: extract audio, transcribe, index"""
+    video_id = job.payload["video_id"]
+    
+    await job.set_stage("extract", 0.1)
+    audio_path = cache_manager.get_audio_path(video_id)
+    if not audio_path:
+        audio_path = await extract_audio(job.payload["video_path"], video_id)
+    
+    # A re-upload of known content already has its transcript and index
+    transcript = cache_manager.open_transcript(video_id)
+    segment_count = 0
+    if transcript is not None:
+        with transcript:
+            segment_count = len(transcript)
+    if not segment_count:
+        segment_count = await transcribe_and_index(job, video_id, audio_path)
+    return {
+        "video_id": video_id,
+        "title": job.payload.get("filename"),
+        "segments": segment_count
+    }
+
+
+job_queue.register_handler("youtube", run_youtube_job)
+job_queue.register_handler("upload", run_upload_job)
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+
+@app.on_event("startup")
+async def warm_transcription_backend():
+    # Load the default backend's models (e.g. the local whisper pool) before traffic arrives;
+    # /ready reports 503 until they are in
+    loop = asyncio.get_running_loop()
+    
+    async def preload():
+        try:
+            backend = transcription_service.get_backend()
+            await loop.run_in_executor(None, backend.preload)
+        except Exception as e:
+            print(f"Preloading transcription backend failed: {str(e)}")
+    
+    async def maintain():
+        while True:
+            await asyncio.sleep(60)
+            for backend in list(transcription_service.backends.values()):
+                try:
+                    await loop.run_in_executor(None, backend.maintain)
+                except Exception as e:
+                    print(f"Backend maintenance failed: {str(e)}")
+    
+    asyncio.create_task(preload())
+    asyncio.create_task(maintain())
+
+
+@app.on_event("startup")
+async def start_corpus_sync():
+    # Catch up on transcripts cached before the corpus index existed (or changed while down)
+    async def sync():
+        try:
+            indexed = await asyncio.get_running_loop().run_in_executor(corpus_executor, sync_corpus_index)
+            print(f"Corpus index synced: {indexed} transcripts indexed")
+        except Exception as e:
+            print(f"Corpus index sync failed: {str(e)}")
+    asyncio.create_task(sync())
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+
 @app.get("/")
 async def root():
     return {"message": "SpeechFindr API is running"}
@@ -56,23 +622,18 @@ async def fetch_youtube(request: YouTubeRequest):
         if not video_id:
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
         
-        # Always process fresh - no caching
-        result = await youtube_service.fetch_and_extract_audio(request.url, video_id)
-        result["url"] = request.url
-
-        # If creator captions were found, save them into cache as the transcript
-        if result.get('captions'):
-            try:
-                cache_manager.save_transcript(video_id, result['captions'])
-            except Exception:
-                pass
+        # Served from the fetch cache unless the captions/audio are missing or a refresh is requested;
+        # captioned videos don't download audio at all
+        result = await fetch_video(request.url, video_id, refresh=request.refresh)
 
         return {
             "video_id": video_id,
             "title": result.get("title"),
             "duration": result.get("duration"),
             "url": request.url,
-            "has_creator_captions": bool(result.get('captions'))
+            "has_creator_captions": result["has_creator_captions"],
+            "has_audio": bool(result.get("audio_path")),
+            "cached": result["cached"]
         }
     except Exception as e:
         import traceback
@@ -85,65 +646,108 @@ async def fetch_youtube(request: YouTubeRequest):
 async def upload_video(file: UploadFile = File(...)):
     """Upload video file and extract audio"""
     try:
-        import hashlib
-        import time
-        
-        # Generate unique video ID based on filename and timestamp
-        filename_hash = hashlib.md5(file.filename.encode()).hexdigest()[:8]
-        timestamp = int(time.time() * 1000) % 1000000
-        video_id = f"upload_{filename_hash}_{timestamp}"
-        
-        # Use portable path
-        from pathlib import Path
-        backend_dir = Path(__file__).parent
-        cache_audio_dir = backend_dir / "cache" / "audio"
-        cache_audio_dir.mkdir(parents=True, exist_ok=True)
-        temp_path = cache_audio_dir / f"{video_id}.{file.filename.split('.')[-1]}"
-        
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        upload = await save_upload(file)
+        video_id = upload["video_id"]
         
-        # Extract audio using ffmpeg
-        audio_path = await youtube_service.extract_audio_from_file(str(temp_path), video_id)
+        # Extract audio using ffmpeg (unless this recording was uploaded before)
+        audio_path = upload["audio_path"] or await extract_audio(upload["video_path"], video_id)
         
         return {
             "video_id": video_id,
             "title": file.filename,
             "audio_path": audio_path,
-            "filename": file.filename
+            "filename": file.filename,
+            "duplicate": upload["duplicate"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """Check an If-None-Match header against the current ETag"""
+    if not etag:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def window_transcript(transcript, offset: int, limit: Optional[int],
+                      from_time: Optional[float], to_time: Optional[float], words: bool = False) -> dict:
+    """Select a page of segments, optionally restricted to a time range first"""
+    if from_time is None and to_time is None:
+        lo, hi = 0, len(transcript)
+    else:
+        starts = getattr(transcript, "starts", None)
+        ends = getattr(transcript, "ends", None)
+        if starts is None:
+            starts = [segment["start"] for segment in transcript]
+            ends = [segment["end"] for segment in transcript]
+        lo, hi = time_window(starts, ends, from_time, to_time)
+
+    first = min(lo + offset, hi)
+    last = hi if limit is None else min(first + limit, hi)
+    # Fresh copies: list segments may be shared with the in-memory transcript cache
+    words_of = getattr(transcript, "words", None)
+    segments = []
+    for segment_idx, segment in enumerate(transcript[first:last], first):
+        copy = {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+        if words:
+            copy["words"] = words_of(segment_idx) if words_of else segment.get("words", [])
+        segments.append(copy)
+    return {
+        "transcript": segments,
+        "offset": first,
+        "total_count": len(transcript),
+        "window_count": hi - lo,
+        "has_more": last < hi
+    }
+
+
 @app.get("/transcript")
-async def get_transcript(video_id: str = Query(...)):
-    """Get transcript with timestamps"""
+async def get_transcript(
+    request: Request,
+    video_id: str = Query(...),
+    offset: int = Query(0, ge=0, description="Segments to skip (within the time range, if given)"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of segments to return"),
+    from_time: Optional[float] = Query(None, ge=0, description="Only segments ending after this time (seconds)"),
+    to_time: Optional[float] = Query(None, ge=0, description="Only segments starting before this time (seconds)"),
+    words: bool = Query(False, description="Include word-level timings for each segment"),
+    backend: Optional[str] = Query(None, description="Transcription backend (openai, local, fake)")
+):
+    """Get transcript with timestamps, optionally a page or time window of it"""
     try:
-        # Always process fresh - no caching
-        # Get audio path
-        audio_path = cache_manager.get_audio_path(video_id)
-        if not audio_path or not os.path.exists(audio_path):
-            raise HTTPException(status_code=404, detail="Audio file not found. Please fetch the video first.")
-        
+        check_backend(backend)
         # If a cached transcript exists (e.g. creator captions saved during fetch), return it
-        cached = cache_manager.get_transcript(video_id)
+        # (opening it is only an mmap; legacy JSON is migrated here, before the ETag is taken)
+        cached = cache_manager.open_transcript(video_id)
         if cached:
-            return {
-                "video_id": video_id,
-                "transcript": cached,
-                "cached": True
-            }
+            try:
+                etag = cache_manager.transcript_etag(video_id)
+                if etag_matches(request, etag):
+                    return Response(status_code=304, headers={"ETag": etag})
+                # Large payloads: return ORJSONResponse directly to skip FastAPI's jsonable_encoder pass
+                response = {"video_id": video_id, "cached": True}
+                response.update(window_transcript(cached, offset, limit, from_time, to_time, words))
+            finally:
+                cached.close()
+            return ORJSONResponse(response, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
-        # Otherwise transcribe (fresh)
-        transcript = await transcription_service.transcribe_with_timestamps(audio_path)
+        # Otherwise transcribe (served from the transcript cache when the audio was seen before)
+        transcript, report = await transcribe_video(video_id, backend)
+        headers = {}
+        if not report or not report["failed"]:
+            headers = {"ETag": cache_manager.transcript_etag(video_id), "Cache-Control": "no-cache"}
 
-        return {
-            "video_id": video_id,
-            "transcript": transcript,
-            "cached": False
-        }
+        response = {"video_id": video_id, "cached": False}
+        response.update(window_transcript(transcript, offset, limit, from_time, to_time, words))
+        if report and report["failed"]:
+            response["failed_chunks"] = report["failed"]
+        return ORJSONResponse(response, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_detail = str(e)
@@ -153,42 +757,286 @@ async def get_transcript(video_id: str = Query(...)):
 
 @app.get("/search")
 async def search_keyword(
-    keyword: str = Query(...),
-    video_id: str = Query(...)
+    video_id: str = Query(...),
+    keyword: Optional[str] = Query(None),
+    keywords: Optional[List[str]] = Query(None, description="Several keywords/phrases, results grouped per term"),
+    fuzzy: bool = Query(False, description="Tolerate typos; matches are ranked by similarity"),
+    max_edits: Optional[int] = Query(None, ge=0, le=3, description="Edits allowed per word in fuzzy mode"),
+    backend: Optional[str] = Query(None, description="Transcription backend, if the transcript isn't cached yet")
 ):
-    """Search for keyword in transcript"""
+    """Search for keyword in transcript, or for several keywords at once"""
     try:
-        # Validate keyword (check for stopwords)
-        if search_service.is_stopword(keyword):
+        check_backend(backend)
+        terms = ([keyword] if keyword is not None else []) + list(keywords or [])
+        if not terms:
+            raise HTTPException(status_code=400, detail="Provide keyword or keywords")
+        if fuzzy and keywords:
+            raise HTTPException(status_code=400, detail="Fuzzy search takes a single keyword")
+        
+        # Validate keywords (check for stopwords)
+        if any(search_service.is_stopword(term) for term in terms):
             raise HTTPException(
                 status_code=400,
                 detail="Stopwords are not allowed in keyword search"
             )
         
-        # Get transcript (always fresh - no cache)
-        audio_path = cache_manager.get_audio_path(video_id)
-        if not audio_path or not os.path.exists(audio_path):
-            raise HTTPException(status_code=404, detail="Audio file not found. Please fetch the video first.")
+        # Get transcript (creator captions first, then the content-addressed cache).
+        # The cached copy is memory-mapped: only segments with hits get decoded
+        cached = cache_manager.open_transcript(video_id)
+        try:
+            transcript = cached
+            if not transcript:
+                transcript, _ = await transcribe_video(video_id, backend)
         
-        # Transcribe fresh
-        transcript = await transcription_service.transcribe_with_timestamps(audio_path)
+            index = await get_search_index(video_id, transcript)
+            
+            # Several terms: each answered from the inverted index, off the event loop
+            if keywords:
+                results = await asyncio.get_event_loop().run_in_executor(
+                    None, search_service.search_keywords, transcript, terms, index
+                )
+                return ORJSONResponse({
+                    "video_id": video_id,
+                    "keywords": list(results),
+                    "results": results,
+                    "total_count": sum(result["total_count"] for result in results.values())
+                })
         
-        # Search
-        results = search_service.search_keyword(transcript, keyword)
+            # Single keyword (answered from the inverted index)
+            if fuzzy:
+                results = search_service.search_fuzzy(transcript, keyword, index, max_edits)
+            else:
+                results = search_service.search_keyword(transcript, keyword, index)
         
-        return {
-            "video_id": video_id,
-            "keyword": keyword,
-            "matches": results["matches"],
-            "segments": results["segments"],
-            "total_count": results["total_count"]
-        }
+            return ORJSONResponse({
+                "video_id": video_id,
+                "keyword": keyword,
+                "matches": results["matches"],
+                "segments": results["segments"],
+                "total_count": results["total_count"]
+            })
+        finally:
+            if cached is not None:
+                cached.close()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/transcript/retry")
+async def retry_transcript(
+    video_id: str = Query(...),
+    backend: Optional[str] = Query(None, description="Transcription backend (openai, local, fake)")
+):
+    """Re-transcribe only the chunks of a video that failed (or never finished) on an earlier run"""
+    check_backend(backend)
+    if cache_manager.has_transcript(video_id):
+        return {"video_id": video_id, "complete": True, "retried": [], "failed_chunks": []}
+    
+    audio_path = cache_manager.get_audio_path(video_id)
+    if not audio_path or not os.path.exists(audio_path):
+        raise HTTPException(status_code=404, detail="Audio file not found. Please fetch the video first.")
+    loop = asyncio.get_event_loop()
+    checkpoint = await loop.run_in_executor(None, transcription_service.get_checkpoint, audio_path, backend)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="No unfinished transcription to retry for this video")
+    
+    try:
+        transcript, report = await transcribe_video(video_id, backend)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    failed = report["failed"] if report else []
+    return {
+        "video_id": video_id,
+        "complete": not failed,
+        "retried": [{"start": f["start"], "end": f["end"]} for f in checkpoint["failed"]],
+        "restored_chunks": report["restored"] if report else 0,
+        "failed_chunks": failed,
+        "total_segments": len(transcript)
+    }
+
+
+@app.get("/transcript/stream")
+async def stream_transcript(
+    video_id: str = Query(...),
+    words: bool = Query(False, description="Include word-level timings for each segment"),
+    backend: Optional[str] = Query(None, description="Transcription backend (openai, local, fake)")
+):
+    """Stream a transcript as server-sent events, each chunk as soon as it is transcribed.
+    
+    Events: "segments" ({segments, chunk, total_chunks, start, end} while
+    transcribing; batches of a complete transcript otherwise), then "done"
+    (or "error").
+    """
+    check_backend(backend)
+    
+    async def events():
+        cached = cache_manager.open_transcript(video_id)
+        if cached:
+            try:
+                for offset in range(0, len(cached), STREAM_BATCH_SIZE):
+                    page = window_transcript(cached, offset, STREAM_BATCH_SIZE, None, None, words)
+                    yield sse_event("segments", {"segments": page["transcript"]})
+                total = len(cached)
+            finally:
+                cached.close()
+            yield sse_event("done", {"video_id": video_id, "cached": True, "total_segments": total})
+            return
+        
+        streamed = []
+        async for kind, data in follow_transcription(video_id, backend):
+            if kind == "keepalive":
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            elif kind == "chunk":
+                streamed.append((data["start"], data["end"]))
+                yield sse_event("segments", {
+                    "segments": window_transcript(data["segments"], 0, None, None, None, words)["transcript"],
+                    "chunk": data["chunk"],
+                    "total_chunks": data["total_chunks"],
+                    "start": data["start"],
+                    "end": data["end"]
+                })
+            elif kind == "error":
+                yield sse_event("error", data)
+            else:
+                transcript, report = data["transcript"], data["report"]
+                # Whatever no chunk covered: all of it when transcribed in one piece
+                # (or served from the transcription cache)
+                rest = uncovered_segments(transcript, streamed)
+                if rest:
+                    yield sse_event("segments", {
+                        "segments": window_transcript(rest, 0, None, None, None, words)["transcript"]
+                    })
+                yield sse_event("done", {
+                    "video_id": video_id,
+                    "cached": False,
+                    "total_segments": len(transcript),
+                    "failed_chunks": report["failed"] if report else []
+                })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/search/stream")
+async def stream_search(
+    video_id: str = Query(...),
+    keyword: str = Query(...),
+    backend: Optional[str] = Query(None, description="Transcription backend, if the transcript isn't cached yet")
+):
+    """Search a transcript while it is still being transcribed, as server-sent events.
+    
+    Each transcribed chunk yields a "matches" event with its hits (in
+    search_keyword's shape plus a running total_count); "done" follows the
+    last chunk.
+    """
+    check_backend(backend)
+    if search_service.is_stopword(keyword):
+        raise HTTPException(status_code=400, detail="Stopwords are not allowed in keyword search")
+    
+    async def events():
+        cached = cache_manager.open_transcript(video_id)
+        if cached:
+            try:
+                index = await get_search_index(video_id, cached)
+                results = search_service.search_keyword(cached, keyword, index)
+            finally:
+                cached.close()
+            yield sse_event("matches", dict(results, keyword=keyword))
+            yield sse_event("done", {"video_id": video_id, "keyword": keyword, "cached": True,
+                                     "total_count": results["total_count"]})
+            return
+        
+        total = 0
+        streamed = []
+        async for kind, data in follow_transcription(video_id, backend):
+            if kind == "keepalive":
+                yield ": keep-alive\n\n"
+            elif kind == "chunk":
+                streamed.append((data["start"], data["end"]))
+                results = search_service.search_keyword(data["segments"], keyword)
+                total += results["total_count"]
+                yield sse_event("matches", dict(
+                    results, keyword=keyword, chunk=data["chunk"], total_chunks=data["total_chunks"],
+                    start=data["start"], end=data["end"], total_count=total
+                ))
+            elif kind == "error":
+                yield sse_event("error", data)
+            else:
+                rest = uncovered_segments(data["transcript"], streamed)
+                if rest:
+                    results = search_service.search_keyword(rest, keyword)
+                    total += results["total_count"]
+                    yield sse_event("matches", dict(results, keyword=keyword, total_count=total))
+                yield sse_event("done", {
+                    "video_id": video_id,
+                    "keyword": keyword,
+                    "cached": False,
+                    "total_count": total,
+                    "failed_chunks": data["report"]["failed"] if data["report"] else []
+                })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/corpus/search")
+async def search_corpus(
+    q: str = Query(..., description="Words to find; quote parts to match them as a phrase"),
+    top_k: int = Query(10, ge=1, le=100),
+    hits_per_video: int = Query(5, ge=1, le=50)
+):
+    """Rank every cached transcript for a query (BM25) with per-video timestamp hits"""
+    try:
+        if search_service.is_stopword(q):
+            raise HTTPException(
+                status_code=400,
+                detail="Stopwords are not allowed in keyword search"
+            )
+        
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: corpus_index.search(q, top_k=top_k, hits_per_video=hits_per_video)
+        )
+        return ORJSONResponse({
+            "query": q,
+            "results": results["results"],
+            "total_count": len(results["results"])
+        })
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/waveform")
+async def get_waveform(
+    video_id: str = Query(...),
+    points: int = Query(1000, ge=1, le=20000, description="Number of peak values to return")
+):
+    """Peak levels of a video's audio, read from its canonical PCM decode"""
+    audio_path = await ensure_audio(video_id)
+    
+    loop = asyncio.get_event_loop()
+    try:
+        pcm = await loop.run_in_executor(None, transcription_service.pcm_store.open, audio_path)
+        peaks = await loop.run_in_executor(None, pcm.peaks, points)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "video_id": video_id,
+        "duration": round(pcm.duration, 3),
+        "peaks": peaks
+    }
+
+
 @app.post("/summarize")
 async def summarize(request: SummarizeRequest):
     """Summarize transcript segments"""
@@ -217,6 +1065,135 @@ async def summarize(request: SummarizeRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 503 until the default transcription backend's warm models are loaded"""
+    try:
+        backend = transcription_service.get_backend()
+    except ValueError as e:
+        return ORJSONResponse({"ready": False, "error": str(e)}, status_code=503)
+    ready = backend.is_ready()
+    return ORJSONResponse(
+        {"ready": ready, "backend": backend.name, "detail": backend.stats()},
+        status_code=200 if ready else 503
+    )
+
+
+@app.get("/stats")
+async def get_stats():
+    """Get cache hit/miss and request coalescing counters"""
+    return {
+        "transcript_cache": transcription_service.transcript_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "corpus_index": corpus_index.stats(),
+        "transcription_backends": transcription_service.backend_stats(),
+        "vad": transcription_service.vad_stats(),
+        "pcm": transcription_service.pcm_store.stats(),
+        "checkpoints": transcription_service.checkpoints.stats()
+    }
+
+
+@app.delete("/cache/transcript")
+async def invalidate_transcript(video_id: str = Query(...)):
+    """Drop cached transcriptions for a video's audio so the next request re-transcribes"""
+    audio_path = cache_manager.get_audio_path(video_id)
+    has_audio = bool(audio_path and os.path.exists(audio_path))
+    if not has_audio and not cache_manager.has_transcript(video_id):
+        raise HTTPException(status_code=404, detail="Audio file not found. Please fetch the video first.")
+    
+    # Caption-only videos have no audio, hence nothing in the transcription cache.
+    # Listeners drop what hangs off both caches: checkpoints, PCM decode, search index
+    removed = 0
+    if has_audio:
+        removed = await asyncio.get_event_loop().run_in_executor(
+            None, transcription_service.transcript_cache.invalidate_audio, audio_path
+        )
+    cache_manager.delete_transcript(video_id)
+    return {
+        "video_id": video_id,
+        "invalidated": removed
+    }
+
+
+@app.post("/jobs/youtube")
+async def submit_youtube_job(request: YouTubeRequest):
+    """Queue fetch -> transcribe -> index for a YouTube URL and return a job id immediately"""
+    video_id = youtube_service.extract_video_id(request.url)
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+    check_backend(request.backend)
+    
+    job_id = job_queue.submit("youtube", {"url": request.url, "video_id": video_id, "backend": request.backend})
+    return {
+        "job_id": job_id,
+        "video_id": video_id,
+        "status": "queued"
+    }
+
+
+@app.post("/jobs/upload")
+async def submit_upload_job(file: UploadFile = File(...), backend: Optional[str] = Form(None)):
+    """Save an upload and queue extract -> transcribe -> index for it"""
+    check_backend(backend)
+    try:
+        upload = await save_upload(file)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    video_id = upload["video_id"]
+    job_id = job_queue.submit("upload", {
+        "video_id": video_id,
+        "video_path": upload["video_path"],
+        "filename": file.filename,
+        "backend": backend
+    })
+    return {
+        "job_id": job_id,
+        "video_id": video_id,
+        "status": "queued"
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get job status, current stage and result"""
+    state = job_queue.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return state
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job stage updates as server-sent events until the job finishes"""
+    state = job_queue.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        queue = job_queue.subscribe(job_id)
+        try:
+            # Re-read after subscribing so no update falls between the two
+            current = job_queue.get(job_id)
+            yield sse_event(current["status"], current)
+            while current["status"] not in TERMINAL_STATUSES:
+                try:
+                    current = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_event(current["status"], current)
+        finally:
+            job_queue.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,206 @@
+import html
+import itertools
+import re
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+
+from utils.word_timing import WORD_PATTERN, interpolate_words
+
+
+# Inline cue markup: <00:00:01.234> timing tags, <c>/<i>/<b>/<u>/<v Speaker>/<lang> spans
+TAG_PATTERN = re.compile(r"<(\d{1,2}:)?\d{1,2}:\d{2}[.,]\d{1,3}>|</?[a-zA-Z][^>]*>")
+TIMESTAMP_PATTERN = re.compile(r"<((?:\d{1,2}:)?\d{1,2}:\d{2}[.,]\d{1,3})>")
+# Header and metadata blocks of a WebVTT file that carry no cue text
+VTT_BLOCKS = ("WEBVTT", "NOTE", "STYLE", "REGION")
+
+
+def parse_timestamp(value: str) -> float:
+    """HH:MM:SS.mmm, MM:SS.mmm or SRT's HH:MM:SS,mmm in seconds"""
+    parts = [float(part) for part in value.strip().replace(',', '.').split(':')]
+    if len(parts) == 3:
+        return parts[0] * 3600 + parts[1] * 60 + parts[2]
+    if len(parts) == 2:
+        return parts[0] * 60 + parts[1]
+    raise ValueError(f"Bad timestamp: {value}")
+
+
+def clean_line(line: str, start: float) -> Tuple[str, List[Tuple[int, float]]]:
+    """Strip markup from one cue line.
+
+    Returns the plain text and the inline timing tags as (char offset, time)
+    pairs - YouTube's word-by-word captions time every word this way.
+    """
+    stamps = [(0, start)]
+    if '<' not in line and '&' not in line:
+        return ' '.join(line.split()), stamps
+
+    # Whitespace is collapsed piece by piece so stamp offsets stay valid in the result
+    pieces: List[str] = []
+    length = 0
+    position = 0
+    for match in TAG_PATTERN.finditer(line):
+        length = _append_piece(pieces, length, line[position:match.start()])
+        stamp = TIMESTAMP_PATTERN.fullmatch(match.group(0))
+        if stamp:
+            stamps.append((length, parse_timestamp(stamp.group(1))))
+        position = match.end()
+    length = _append_piece(pieces, length, line[position:])
+    text = ''.join(pieces).rstrip()
+    return text, [(min(offset, len(text)), time) for offset, time in stamps]
+
+
+def _append_piece(pieces: List[str], length: int, piece: str) -> int:
+    """Append text between tags with its whitespace collapsed; returns the new total length"""
+    if '&' in piece:
+        piece = html.unescape(piece)
+    if piece[:1].isspace() and length and not pieces[-1].endswith(' '):
+        pieces.append(' ')
+        length += 1
+    core = ' '.join(piece.split())
+    if core:
+        pieces.append(core)
+        length += len(core)
+        if piece[-1:].isspace():
+            pieces.append(' ')
+            length += 1
+    return length
+
+
+def iter_cues(lines: Iterable[str]) -> Iterator[Tuple[float, float, List[str]]]:
+    """Stream raw cues (start, end, text lines) from WebVTT or SRT lines"""
+    timing = None
+    texts: List[str] = []
+    skipping = False
+    for line in lines:
+        line = line.strip().lstrip('\ufeff')
+        if not line:
+            if timing is not None:
+                yield timing[0], timing[1], texts
+            timing = None
+            texts = []
+            skipping = False
+            continue
+        if skipping:
+            continue
+        if '-->' in line:
+            if timing is not None:
+                # A cue without a closing blank line
+                yield timing[0], timing[1], texts
+                texts = []
+            start, _, rest = line.partition('-->')
+            try:
+                # Anything after the end time is cue settings (align:start position:0%)
+                timing = (parse_timestamp(start), parse_timestamp(rest.split()[0]))
+            except (ValueError, IndexError):
+                timing = None
+                skipping = True
+        elif timing is not None:
+            texts.append(line)
+        elif line.startswith(VTT_BLOCKS):
+            skipping = True
+        # Otherwise an SRT index or VTT cue identifier
+    if timing is not None:
+        yield timing[0], timing[1], texts
+
+
+def _line_words(text: str, stamps: List[Tuple[int, float]], offset: int,
+                end: float) -> List[Dict]:
+    """Word timings of one line from its inline stamps.
+
+    Words after the same stamp share the time up to the next stamp (or the
+    cue's end) evenly.
+    """
+    spans = [match.span() for match in WORD_PATTERN.finditer(text)]
+    groups: List[List[Tuple[int, int]]] = []
+    times: List[float] = []
+    stamp_index = 0
+    for span in spans:
+        previous_index = stamp_index
+        while stamp_index + 1 < len(stamps) and stamps[stamp_index + 1][0] <= span[0]:
+            stamp_index += 1
+        if not groups or stamp_index != previous_index:
+            groups.append([])
+            times.append(stamps[stamp_index][1])
+        groups[-1].append(span)
+
+    words = []
+    for index, group in enumerate(groups):
+        group_start = times[index]
+        group_end = max(times[index + 1] if index + 1 < len(groups) else end, group_start)
+        step = (group_end - group_start) / len(group)
+        for k, (char_start, char_end) in enumerate(group):
+            words.append({
+                "start": round(group_start + step * k, 3),
+                "end": round(group_start + step * (k + 1), 3),
+                "char_start": offset + char_start,
+                "char_end": offset + char_end
+            })
+    return words
+
+
+def parse_captions(lines: Iterable[str]) -> Iterator[Dict]:
+    """Stream normalised caption segments from WebVTT or SRT lines.
+
+    Markup and timing tags are stripped. YouTube's rolling captions, where
+    each cue repeats the line(s) of the cue before it, are reduced to the
+    new lines only, and cues that add nothing just extend the previous
+    segment. Only WebVTT cues that start where the previous one ended count
+    as rolling, so genuinely repeated lines ("Yes." / "Yes.") are kept.
+    Word times come from inline timing tags when the file has them, else
+    are spread over the cue.
+    """
+    lines = iter(lines)
+    first = next(lines, '')
+    rolling = first.strip().lstrip('\ufeff').startswith('WEBVTT')
+
+    previous: List[str] = []
+    previous_end = float('-inf')
+    pending: Optional[Dict] = None
+    for start, end, raw_lines in iter_cues(itertools.chain([first], lines)):
+        cleaned = [clean_line(line, start) for line in raw_lines]
+        cleaned = [(text, stamps) for text, stamps in cleaned if text]
+        texts = [text for text, _ in cleaned]
+        if not texts:
+            continue
+
+        # Longest run of leading lines that repeats the end of the previous, contiguous cue
+        carried = 0
+        if rolling and start <= previous_end + 0.001:
+            for count in range(min(len(previous), len(texts)), 0, -1):
+                if previous[-count:] == texts[:count]:
+                    carried = count
+                    break
+        previous = texts
+        previous_end = end
+        new = cleaned[carried:]
+
+        if not new:
+            if pending is not None:
+                pending["end"] = max(pending["end"], end)
+            continue
+        if pending is not None:
+            yield pending
+
+        text = ' '.join(line for line, _ in new)
+        if any(len(stamps) > 1 for _, stamps in new):
+            words = []
+            offset = 0
+            for line, stamps in new:
+                if len(stamps) > 1:
+                    words.extend(_line_words(line, stamps, offset, end))
+                else:
+                    for word in interpolate_words(start, end, line):
+                        word["char_start"] += offset
+                        word["char_end"] += offset
+                        words.append(word)
+                offset += len(line) + 1
+        else:
+            words = interpolate_words(start, end, text)
+        pending = {"start": start, "end": end, "text": text, "words": words}
+    if pending is not None:
+        yield pending
+
+
+def parse_caption_file(path: str) -> Iterator[Dict]:
+    """Stream segments from a .vtt/.srt file without reading it into memory"""
+    with open(path, encoding='utf-8-sig', errors='replace') as f:
+        yield from parse_captions(f)
@@ -0,0 +1,183 @@
+from typing import List, Dict, Optional, Tuple
+import re
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def trigrams(term: str) -> set:
+    """Padded character trigrams, so short words still have a few"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Levenshtein distance between a and b, or None once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+class TranscriptIndex:
+    """Inverted word-position index over a single transcript.
+
+    Maps each lowercased token to its (segment_idx, char_offset) postings.
+    Offsets refer to the lowercased segment text, the same coordinates
+    SearchService has always reported as match_position.
+    """
+
+    VERSION = 1
+
+    def __init__(self, postings: Dict[str, List[List[int]]], segment_count: int):
+        self.postings = postings
+        self.segment_count = segment_count
+        # Vocabulary trigram and length maps for substring and fuzzy lookups (derived, built on first use)
+        self._trigram_terms: Optional[Dict[str, List[str]]] = None
+        self._length_terms: Optional[Dict[int, List[str]]] = None
+
+    @classmethod
+    def build(cls, transcript: List[Dict]) -> "TranscriptIndex":
+        """Build the index in one pass over the transcript"""
+        postings: Dict[str, List[List[int]]] = {}
+        for segment_idx, segment in enumerate(transcript):
+            text_lower = segment.get("text", "").lower()
+            for match in TOKEN_PATTERN.finditer(text_lower):
+                postings.setdefault(match.group(), []).append([segment_idx, match.start()])
+        return cls(postings, len(transcript))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional["TranscriptIndex"]:
+        """Load a persisted index, returning None if it is from another version"""
+        if not data or data.get("version") != cls.VERSION:
+            return None
+        return cls(data["postings"], data["segment_count"])
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.VERSION,
+            "segment_count": self.segment_count,
+            "postings": self.postings,
+        }
+
+    def find(self, transcript: List[Dict], keyword: str) -> Optional[List[Tuple[int, int]]]:
+        """Find every (segment_idx, match_position) of keyword as a substring.
+
+        Matches are the same as a case-insensitive substring scan of every
+        segment, but only segments containing the keyword's longest token are
+        ever looked at, and only vocabulary terms sharing its rarest trigram
+        are checked for it. Returns None when the keyword has no word
+        characters and cannot be answered from the index.
+        """
+        keyword_lower = keyword.lower()
+        tokens = list(TOKEN_PATTERN.finditer(keyword_lower))
+        if not tokens:
+            return None
+
+        # Anchor on the longest token: it has the fewest postings
+        anchor = max(tokens, key=lambda m: len(m.group()))
+        anchor_text = anchor.group()
+        anchor_offset = anchor.start()
+        needs_verify = anchor_text != keyword_lower
+
+        hits = set()
+        lowered: Dict[int, str] = {}
+        # Substring semantics: the anchor may sit inside a longer word, so
+        # every vocabulary term containing it contributes its postings
+        for term in self._terms_containing(anchor_text):
+            term_postings = self.postings[term]
+            term_pos = term.find(anchor_text)
+            while term_pos != -1:
+                for segment_idx, char_offset in term_postings:
+                    position = char_offset + term_pos - anchor_offset
+                    if needs_verify:
+                        if position < 0:
+                            continue
+                        text_lower = lowered.get(segment_idx)
+                        if text_lower is None:
+                            text_lower = transcript[segment_idx]["text"].lower()
+                            lowered[segment_idx] = text_lower
+                        if not text_lower.startswith(keyword_lower, position):
+                            continue
+                    hits.add((segment_idx, position))
+                term_pos = term.find(anchor_text, term_pos + 1)
+
+        return sorted(hits)
+
+    def _terms_containing(self, text: str) -> List[str]:
+        """Vocabulary terms that contain text (a single token)"""
+        if self._trigram_terms is None:
+            self._build_vocabulary_maps()
+
+        if len(text) >= 3:
+            # A term containing text has every inner trigram of it; start from the rarest
+            grams = [text[i:i + 3] for i in range(len(text) - 2)]
+            candidates = min((self._trigram_terms.get(gram, ()) for gram in grams), key=len)
+        else:
+            # Too short for an inner trigram: the (padded) trigrams holding it, a far
+            # smaller set than the vocabulary, name every term that contains it
+            candidates = {
+                term
+                for gram, terms in self._trigram_terms.items() if text in gram
+                for term in terms
+            }
+        return [term for term in candidates if text in term]
+
+    def prepare(self):
+        """Build the vocabulary maps now, so the first query doesn't pay for them"""
+        if self._trigram_terms is None:
+            self._build_vocabulary_maps()
+
+    def _build_vocabulary_maps(self):
+        trigram_terms: Dict[str, List[str]] = {}
+        length_terms: Dict[int, List[str]] = {}
+        for term in self.postings:
+            for gram in trigrams(term):
+                trigram_terms.setdefault(gram, []).append(term)
+            length_terms.setdefault(len(term), []).append(term)
+        self._trigram_terms = trigram_terms
+        self._length_terms = length_terms
+
+    def similar_terms(self, token: str, max_edits: int) -> Dict[str, int]:
+        """Vocabulary terms within max_edits of token, mapped to their edit distance.
+
+        A term within k edits shares at least (trigram count - 3k) trigrams
+        with the token, so only terms reaching that count are verified; when
+        the bound is too weak (short tokens) terms of a compatible length are
+        checked instead. Either way no all-pairs scan is needed.
+        """
+        if self._trigram_terms is None:
+            self._build_vocabulary_maps()
+
+        token_grams = trigrams(token)
+        required = len(token_grams) - 3 * max_edits
+        if required > 0:
+            shared: Dict[str, int] = {}
+            for gram in token_grams:
+                for term in self._trigram_terms.get(gram, ()):
+                    shared[term] = shared.get(term, 0) + 1
+            candidates = [term for term, count in shared.items() if count >= required]
+        else:
+            candidates = [
+                term
+                for length in range(len(token) - max_edits, len(token) + max_edits + 1)
+                for term in self._length_terms.get(length, ())
+            ]
+
+        similar = {}
+        for term in candidates:
+            distance = bounded_edit_distance(token, term, max_edits)
+            if distance is not None:
+                similar[term] = distance
+        return similar
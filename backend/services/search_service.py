@@ -1,5 +1,8 @@
-from typing import List, Dict
-import re
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+
+from services.search_index import TranscriptIndex, TOKEN_PATTERN
+from utils.word_timing import interpolate_words, hit_times
 
 
 class SearchService:
@@ -24,45 +27,206 @@ class SearchService:
             'must', 'can', 'could', 'ought', 'need', 'dare', 'also', 'just', 'even', 'only', 'still', 'yet', 'ever', 'never'
         }
     
+        # Recently used indexes, keyed by video_id
+        self._indexes: "OrderedDict[str, TranscriptIndex]" = OrderedDict()
+        self.max_cached_indexes = 16
+    
+    def get_cached_index(self, video_id: str) -> Optional[TranscriptIndex]:
+        """Get an index that is already loaded in memory"""
+        index = self._indexes.get(video_id)
+        if index is not None:
+            self._indexes.move_to_end(video_id)
+        return index
+    
+    def cache_index(self, video_id: str, index: TranscriptIndex):
+        """Keep an index in memory, evicting the least recently used one"""
+        self._indexes[video_id] = index
+        self._indexes.move_to_end(video_id)
+        while len(self._indexes) > self.max_cached_indexes:
+            self._indexes.popitem(last=False)
+    
+    def drop_index(self, video_id: str):
+        """Forget the in-memory index for a video"""
+        self._indexes.pop(video_id, None)
+    
     def is_stopword(self, keyword: str) -> bool:
         """Check if keyword is a stopword"""
         keyword_lower = keyword.lower().strip()
         return keyword_lower in self.stopwords or len(keyword_lower) < 2
     
-    def search_keyword(self, transcript: List[Dict], keyword: str) -> Dict:
+    def build_index(self, transcript: List[Dict]) -> TranscriptIndex:
+        """Build the inverted index used to answer searches on a transcript (with its vocabulary maps)"""
+        index = TranscriptIndex.build(transcript)
+        index.prepare()
+        return index
+    
+    def search_keyword(self, transcript: List[Dict], keyword: str, index: Optional[TranscriptIndex] = None) -> Dict:
         """Search for keyword in transcript and return matches with segments"""
-        keyword_lower = keyword.lower()
+        hits = None
+        if index is not None and index.segment_count == len(transcript):
+            hits = index.find(transcript, keyword)
+        if hits is None:
+            hits = self._scan(transcript, keyword)
+        
+        return self._collect(transcript, hits, len(keyword))
+    
+    def search_keywords(self, transcript: List[Dict], keywords: List[str],
+                        index: Optional[TranscriptIndex] = None) -> Dict[str, Dict]:
+        """Search for several keywords/phrases, each answered from the index.
+        
+        Returns a search_keyword-shaped result per keyword. Keywords are
+        matched case-insensitively, so ones differing only in case share hits.
+        """
+        hits: Dict[str, List[Tuple[int, int]]] = {}
+        for term in dict.fromkeys(keyword.lower() for keyword in keywords):
+            term_hits = None
+            if index is not None and index.segment_count == len(transcript):
+                term_hits = index.find(transcript, term)
+            hits[term] = term_hits if term_hits is not None else self._scan(transcript, term)
+        
+        return {
+            keyword: self._collect(transcript, hits[keyword.lower()], len(keyword))
+            for keyword in keywords
+        }
+    
+    def default_max_edits(self, token: str) -> int:
+        """Typo budget by word length: exact for very short words, up to 2 edits for long ones"""
+        if len(token) <= 3:
+            return 0
+        if len(token) <= 7:
+            return 1
+        return 2
+    
+    def search_fuzzy(self, transcript: List[Dict], keyword: str, index: TranscriptIndex,
+                     max_edits: Optional[int] = None) -> Dict:
+        """Typo-tolerant search, ranked by similarity.
+        
+        Each word of the keyword matches any transcript word within its edit
+        budget (found through the index's vocabulary trigrams); phrases must
+        match consecutive words. Matches carry the matched surface form and a
+        0-1 similarity score.
+        """
+        tokens = TOKEN_PATTERN.findall(keyword.lower())
+        if not tokens:
+            return {"matches": [], "segments": [], "total_count": 0}
+        
+        candidates = [
+            index.similar_terms(token, self.default_max_edits(token) if max_edits is None else max_edits)
+            for token in tokens
+        ]
+        
+        found = []
+        for first_term, first_distance in candidates[0].items():
+            for segment_idx, position in index.postings[first_term]:
+                found.append((segment_idx, position, first_term, first_distance))
+        
         matches = []
+        matched_segments = set()
+        words_by_segment: Dict[int, List] = {}
+        for segment_idx, position, first_term, distance in found:
+            segment = transcript[segment_idx]
+            end = position + len(first_term)
+            compared = max(len(tokens[0]), len(first_term))
+            
+            if len(tokens) > 1:
+                # Phrase: the following words must match the remaining tokens in order
+                words = words_by_segment.get(segment_idx)
+                if words is None:
+                    words = list(TOKEN_PATTERN.finditer(segment["text"].lower()))
+                    words_by_segment[segment_idx] = words
+                word_idx = next(i for i, word in enumerate(words) if word.start() == position)
+                following = words[word_idx + 1:word_idx + len(tokens)]
+                if len(following) < len(tokens) - 1 or any(
+                    word.group() not in similar for word, similar in zip(following, candidates[1:])
+                ):
+                    continue
+                for token, word, similar in zip(tokens[1:], following, candidates[1:]):
+                    distance += similar[word.group()]
+                    compared += max(len(token), len(word.group()))
+                end = following[-1].end()
+            
+            word_start, word_end = self._hit_times(transcript, segment_idx, segment, position, end)
+            matches.append({
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"],
+                "match_position": position,
+                "word_start": word_start,
+                "word_end": word_end,
+                "matched": segment["text"][position:end],
+                "similarity": round(1 - distance / compared, 3)
+            })
+            matched_segments.add(segment_idx)
+        
+        matches.sort(key=lambda match: (-match["similarity"], match["start"], match["match_position"]))
         segments = []
+        for segment_idx in sorted(matched_segments):
+            segment = transcript[segment_idx]
+            segments.append({
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"]
+            })
         
-        for segment in transcript:
-            text_lower = segment["text"].lower()
-            if keyword_lower in text_lower:
-                # Find all occurrences in this segment
-                start_pos = 0
-                while True:
-                    pos = text_lower.find(keyword_lower, start_pos)
-                    if pos == -1:
-                        break
-                    matches.append({
-                        "start": segment["start"],
-                        "end": segment["end"],
-                        "text": segment["text"],
-                        "match_position": pos
-                    })
-                    start_pos = pos + 1
-                
-                # Add segment if not already added
-                if segment not in segments:
-                    segments.append({
-                        "start": segment["start"],
-                        "end": segment["end"],
-                        "text": segment["text"]
-                    })
+        return {
+            "matches": matches,
+            "segments": segments,
+            "total_count": len(matches)
+        }
+    
+    def _hit_times(self, transcript: List[Dict], segment_idx: int, segment: Dict,
+                   char_start: int, char_end: int) -> Tuple[float, float]:
+        """Time span of the words a hit covers: stored word timings, else interpolated"""
+        words_of = getattr(transcript, "words", None)
+        words = words_of(segment_idx) if words_of else segment.get("words")
+        if not words:
+            words = interpolate_words(segment["start"], segment["end"], segment["text"])
+        times = hit_times(words, char_start, char_end)
+        return times if times else (segment["start"], segment["end"])
+    
+    def _collect(self, transcript: List[Dict], hits: List[Tuple[int, int]], length: int) -> Dict:
+        """Turn ordered (segment_idx, pos) hits of a length-character keyword into matches and matching segments"""
+        matches = []
+        segments = []
+        last_segment_idx = None
+        for segment_idx, pos in hits:
+            segment = transcript[segment_idx]
+            word_start, word_end = self._hit_times(transcript, segment_idx, segment, pos, pos + length)
+            matches.append({
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"],
+                "match_position": pos,
+                "word_start": word_start,
+                "word_end": word_end
+            })
+            
+            # Hits are ordered by segment, so each segment is added once
+            if segment_idx != last_segment_idx:
+                segments.append({
+                    "start": segment["start"],
+                    "end": segment["end"],
+                    "text": segment["text"]
+                })
+                last_segment_idx = segment_idx
         
         return {
             "matches": matches,
             "segments": segments,
             "total_count": len(matches)
         }
-
+    
+    def _scan(self, transcript: List[Dict], keyword: str) -> List[Tuple[int, int]]:
+        """Linear substring scan, used when no index is available"""
+        keyword_lower = keyword.lower()
+        hits = []
+        
+        for segment_idx, segment in enumerate(transcript):
+            text_lower = segment["text"].lower()
+            # Find all occurrences in this segment
+            pos = text_lower.find(keyword_lower)
+            while pos != -1:
+                hits.append((segment_idx, pos))
+                pos = text_lower.find(keyword_lower, pos + 1)
+        
+        return hits
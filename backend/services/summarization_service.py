@@ -6,10 +6,17 @@ from typing import List, Dict
 
 class SummarizationService:
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment")
-        self.client = OpenAI(api_key=api_key)
+        # Created on first use, so the app can run (e.g. with a local transcription backend) without a key
+        self._client = None
+    
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment")
+            self._client = OpenAI(api_key=api_key)
+        return self._client
     
     async def summarize_segments(self, segments: List[Dict], keyword: str) -> str:
         """Summarize transcript segments using GPT-3.5-turbo or GPT-4o-mini"""
@@ -0,0 +1,331 @@
+import os
+import hashlib
+import random
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
+
+from openai import OpenAI
+
+from utils.model_pool import ModelPool
+from utils.pcm_audio import PCMAudio, is_canonical_wav
+
+
+# A backend returns (segments, words): segments are {"start", "end", "text"} and
+# words a flat, time-ordered list of {"word", "start", "end"} (may be empty).
+BackendResult = Tuple[List[Dict], List[Dict]]
+
+
+class TranscriptionBackend:
+    """Speech-to-text engine used by TranscriptionService.
+
+    transcribe() is blocking and is run in a thread pool. max_file_size and
+    supported_formats tell the service when a file must be split or converted
+    first (None means no limit / any format ffmpeg can read). Backends with
+    accepts_pcm are always handed the canonical 16 kHz mono PCM WAV.
+    """
+
+    name = "base"
+    max_file_size: Optional[int] = None
+    supported_formats: Optional[Tuple[str, ...]] = None
+    max_concurrency: Optional[int] = None  # cap on simultaneous chunk calls, None = service default
+    accepts_pcm = False
+
+    def cache_params(self) -> Dict:
+        """Settings that change the output, for the transcript cache key"""
+        return {"backend": self.name}
+
+    def transcribe(self, audio_path: str) -> BackendResult:
+        raise NotImplementedError
+
+    def preload(self):
+        """Load models ahead of the first request (blocking); no-op for stateless backends"""
+
+    def is_ready(self) -> bool:
+        """Whether the backend can serve without a cold start"""
+        return True
+
+    def stats(self) -> Optional[Dict]:
+        """Backend-specific counters for /stats, if any"""
+        return None
+
+    def maintain(self):
+        """Periodic housekeeping (e.g. unloading idle models)"""
+
+
+class OpenAIBackend(TranscriptionBackend):
+    """OpenAI Whisper API (whisper-1); the client is only created on first use"""
+
+    name = "openai"
+    max_file_size = 25 * 1024 * 1024  # 25MB limit for OpenAI
+    supported_formats = ('.mp3', '.mp4', '.mpeg', '.mpga', '.m4a', '.wav', '.webm')
+
+    def __init__(self, model: str = "whisper-1"):
+        self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise ValueError("OPENAI_API_KEY not found in environment")
+                self._client = OpenAI(api_key=api_key)
+        return self._client
+
+    def cache_params(self) -> Dict:
+        # Same keys as before backends existed, so existing cache entries stay valid
+        return {"model": self.model, "response_format": "verbose_json"}
+
+    def transcribe(self, audio_path: str) -> BackendResult:
+        result = self._request(audio_path)
+
+        segments = []
+        words = []
+        # Process segments - handle both dict and object responses
+        if isinstance(result, dict):
+            if result.get('segments'):
+                for segment in result['segments']:
+                    segments.append({
+                        "start": segment.get('start', 0.0),
+                        "end": segment.get('end', 0.0),
+                        "text": segment.get('text', '').strip()
+                    })
+                words = result.get('words') or []
+            elif 'text' in result:
+                # Fallback: single segment
+                segments.append({"start": 0.0, "end": 0.0, "text": result.get('text', '').strip()})
+        else:
+            if getattr(result, 'segments', None):
+                for segment in result.segments:
+                    segments.append({
+                        "start": getattr(segment, 'start', 0.0),
+                        "end": getattr(segment, 'end', 0.0),
+                        "text": getattr(segment, 'text', '').strip()
+                    })
+                words = [
+                    {"word": getattr(word, 'word', ''), "start": getattr(word, 'start', 0.0), "end": getattr(word, 'end', 0.0)}
+                    for word in (getattr(result, 'words', None) or [])
+                ]
+            elif hasattr(result, 'text'):
+                segments.append({"start": 0.0, "end": 0.0, "text": getattr(result, 'text', '').strip()})
+        return segments, words
+
+    def _request(self, audio_path: str):
+        # Try with verbose_json first for timestamps, fallback to simple format
+        try:
+            # Word timestamps when the model supports them, plain segments otherwise
+            for granularities in (["word", "segment"], None):
+                try:
+                    with open(audio_path, "rb") as audio_file:
+                        kwargs = {"timestamp_granularities": granularities} if granularities else {}
+                        return self.client.audio.transcriptions.create(
+                            model=self.model,
+                            file=audio_file,
+                            response_format="verbose_json",
+                            **kwargs
+                        )
+                except Exception as e:
+                    if granularities is None:
+                        raise
+                    print(f"Word timestamps unavailable, requesting segments only: {str(e)}")
+        except Exception as e:
+            # If verbose_json fails, try simple format
+            print(f"verbose_json failed, trying simple format: {str(e)}")
+            with open(audio_path, "rb") as audio_file:
+                transcript = self.client.audio.transcriptions.create(
+                    model=self.model,
+                    file=audio_file
+                )
+                # Convert simple response to verbose format
+                if hasattr(transcript, 'text'):
+                    return {"text": transcript.text, "segments": []}
+                elif isinstance(transcript, dict) and 'text' in transcript:
+                    return {"text": transcript['text'], "segments": []}
+                return transcript
+
+
+class LocalWhisperModel:
+    """One loaded faster-whisper model (CTranslate2), optionally with batched decoding"""
+
+    def __init__(self, model: str, compute_type: str, cpu_threads: int, batch_size: int,
+                 model_dir: Optional[str], offline: bool):
+        self.model = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.batch_size = batch_size
+        self.model_dir = model_dir
+        self.offline = offline
+        self._model = None
+        self._pipeline = None
+
+    def load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("The local backend needs faster-whisper: pip install faster-whisper")
+
+        self._model = WhisperModel(
+            self.model,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            download_root=self.model_dir,
+            local_files_only=self.offline
+        )
+        if self.batch_size > 1:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+                self._pipeline = BatchedInferencePipeline(model=self._model)
+            except ImportError:
+                # Older faster-whisper: sequential decoding only
+                self._pipeline = None
+
+    def unload(self):
+        self._pipeline = None
+        self._model = None
+
+    def transcribe(self, audio_path: str) -> BackendResult:
+        # Canonical PCM goes in as samples straight from the memory map, skipping a decode
+        audio = PCMAudio(audio_path).float_samples() if is_canonical_wav(audio_path) else audio_path
+        if self._pipeline is not None:
+            results, _ = self._pipeline.transcribe(audio, batch_size=self.batch_size, word_timestamps=True)
+        else:
+            results, _ = self._model.transcribe(audio, word_timestamps=True)
+
+        segments = []
+        words = []
+        # Segments are produced lazily while decoding
+        for segment in results:
+            segments.append({"start": segment.start, "end": segment.end, "text": segment.text.strip()})
+            for word in segment.words or ():
+                words.append({"word": word.word, "start": word.start, "end": word.end})
+        return segments, words
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """Local CPU transcription with faster-whisper (CTranslate2), int8 by default.
+
+    Needs no GPU, and no network once the model is on disk: point
+    LOCAL_WHISPER_MODEL at a converted model directory (or a model already in
+    LOCAL_WHISPER_MODEL_DIR) and set LOCAL_WHISPER_OFFLINE=1. Models live in
+    a pool of LOCAL_WHISPER_POOL_SIZE instances, each serving one
+    transcription at a time; LOCAL_WHISPER_POOL_WARM of them are kept loaded.
+    """
+
+    name = "local"
+    accepts_pcm = True
+
+    def __init__(self, model: Optional[str] = None, compute_type: Optional[str] = None,
+                 cpu_threads: Optional[int] = None, batch_size: Optional[int] = None,
+                 model_dir: Optional[str] = None, pool_size: Optional[int] = None,
+                 warm: Optional[int] = None):
+        self.model = model or os.getenv("LOCAL_WHISPER_MODEL", "small")
+        self.compute_type = compute_type or os.getenv("LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+        self.cpu_threads = cpu_threads if cpu_threads is not None else int(os.getenv("LOCAL_WHISPER_THREADS", "0"))
+        self.batch_size = max(1, batch_size if batch_size is not None else int(os.getenv("LOCAL_WHISPER_BATCH_SIZE", "8")))
+        self.model_dir = model_dir or os.getenv("LOCAL_WHISPER_MODEL_DIR") or None
+        self.offline = os.getenv("LOCAL_WHISPER_OFFLINE", "0") == "1"
+
+        pool_size = pool_size if pool_size is not None else int(os.getenv("LOCAL_WHISPER_POOL_SIZE", "1"))
+        warm = warm if warm is not None else int(os.getenv("LOCAL_WHISPER_POOL_WARM", "1"))
+        self.pool = ModelPool(
+            self._create_model, size=pool_size, warm=warm,
+            idle_seconds=float(os.getenv("LOCAL_WHISPER_POOL_IDLE_SECONDS", "300")), name=f"whisper-{self.model}"
+        )
+        # One CPU-bound inference per pooled instance; use cpu_threads to scale each one
+        self.max_concurrency = self.pool.size
+
+    def _create_model(self) -> LocalWhisperModel:
+        # Instances share the cores unless a thread count is given
+        cpu_threads = self.cpu_threads or max(1, (os.cpu_count() or 4) // self.pool.size)
+        return LocalWhisperModel(self.model, self.compute_type, cpu_threads, self.batch_size,
+                                 self.model_dir, self.offline)
+
+    def cache_params(self) -> Dict:
+        return {"backend": self.name, "model": self.model, "compute_type": self.compute_type}
+
+    def preload(self):
+        self.pool.preload()
+
+    def is_ready(self) -> bool:
+        return self.pool.ready
+
+    def stats(self) -> Optional[Dict]:
+        return self.pool.stats()
+
+    def maintain(self):
+        self.pool.trim()
+
+    def transcribe(self, audio_path: str) -> BackendResult:
+        with self.pool.acquire() as model:
+            return model.transcribe(audio_path)
+
+
+class FakeBackend(TranscriptionBackend):
+    """Deterministic stand-in for tests and benchmarks: no model, no network.
+
+    The transcript is derived from the file's bytes (same file, same output);
+    its length is the audio's (PCM WAVs) or follows the file size at 64 kbps
+    (anything else). seconds_per_audio_second
+    adds a proportional sleep to mimic a real engine's speed.
+    """
+
+    name = "fake"
+    VOCABULARY = (
+        "the", "speech", "search", "video", "lecture", "eigenvalue", "matrix", "model", "audio",
+        "transcript", "keyword", "summary", "question", "answer", "data", "signal", "network"
+    )
+
+    def __init__(self, segment_seconds: float = 5.0, seconds_per_audio_second: Optional[float] = None):
+        self.segment_seconds = segment_seconds
+        if seconds_per_audio_second is None:
+            seconds_per_audio_second = float(os.getenv("FAKE_TRANSCRIBE_DELAY", "0"))
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def cache_params(self) -> Dict:
+        return {"backend": self.name, "segment_seconds": self.segment_seconds}
+
+    def transcribe(self, audio_path: str) -> BackendResult:
+        size = os.path.getsize(audio_path)
+        digest = hashlib.sha256()
+        with open(audio_path, "rb") as f:
+            digest.update(f.read(1024 * 1024))
+        rng = random.Random(digest.hexdigest())
+
+        # PCM WAVs (what VAD and chunking hand over) know their length; anything else is taken as 64 kbps MP3
+        duration = PCMAudio(audio_path).duration if is_canonical_wav(audio_path) else size / 8000.0
+        duration = max(duration, self.segment_seconds)
+        if self.seconds_per_audio_second:
+            time.sleep(duration * self.seconds_per_audio_second)
+
+        segments = []
+        words = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            count = rng.randint(4, 12)
+            step = (end - start) / count
+            segment_words = [rng.choice(self.VOCABULARY) for _ in range(count)]
+            for i, word in enumerate(segment_words):
+                words.append({"word": word, "start": round(start + i * step, 3), "end": round(start + (i + 1) * step, 3)})
+            segments.append({"start": round(start, 3), "end": round(end, 3), "text": " ".join(segment_words)})
+            start = end
+        return segments, words
+
+
+BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def create_backend(name: str) -> TranscriptionBackend:
+    """Instantiate a backend by name (openai, local, fake)"""
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown transcription backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return backend_class()
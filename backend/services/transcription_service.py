@@ -1,20 +1,62 @@
 import os
-from openai import OpenAI
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Callable
 import asyncio
+import bisect
+import copy
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import subprocess
 import shutil
+import tempfile
+
+from services.transcription_backends import TranscriptionBackend, create_backend
+from services.vad import VoiceActivityDetector, TimeMap, find_silences
+from utils.checkpoint_store import CheckpointStore
+from utils.pcm_audio import PCMStore, PCMAudio
+from utils.transcript_cache import TranscriptCache
+from utils.word_timing import assign_words
+
+
+# Called as each chunk of a long file finishes: (chunk {"index", "start", "end", "run"}, its segments, total chunks).
+# Segments are on the original timeline and owned by the chunk (its overlap with neighbours removed);
+# "run" is the transcription's cache key (audio hash + params), or None when the cache is bypassed.
+ChunkCallback = Callable[[Dict, List[Dict], int], None]
 
 
 class TranscriptionService:
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment")
-        self.client = OpenAI(api_key=api_key)
         self.ffmpeg_path = self._find_ffmpeg()
-        self.max_file_size = 25 * 1024 * 1024  # 25MB limit for OpenAI
+        self.transcript_cache = TranscriptCache()
+        # Every stage works on one decode of the audio: 16 kHz mono PCM, memory-mapped
+        self.pcm_store = PCMStore(self.ffmpeg_path, self.transcript_cache.audio_hash)
+        # Finished chunks of long files, so an interrupted or partly failed run resumes
+        self.checkpoints = CheckpointStore()
+        
+        # Speech-to-text engines (openai, local, fake), created on first use
+        self.default_backend = os.getenv("TRANSCRIBE_BACKEND", "openai")
+        self.backends: Dict[str, TranscriptionBackend] = {}
+        
+        # Chunked transcription: concurrent API calls, per-chunk retries
+        self.max_concurrency = max(1, int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", "4")))
+        self.chunk_retries = max(0, int(os.getenv("TRANSCRIBE_CHUNK_RETRIES", "2")))
+        self.retry_backoff = 2.0  # seconds, doubled after every failed attempt
+        
+        # Chunk boundaries: balanced chunks cut at the nearest silence, with overlap
+        self.chunk_seconds = max(60.0, float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "600")))
+        self.chunk_overlap = max(0.0, float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP", "1.5")))
+        self.boundary_window = 30.0  # how far a cut may move to reach a silence
+        self.silence_noise_db = -35
+        self.silence_min_duration = 0.4
+        self.split_executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="audio-split")
+        self.chunk_reports: Dict[str, Dict] = {}
+        
+        # Voice activity detection: strip silence before transcribing, unless it saves too little
+        self.vad_enabled = os.getenv("TRANSCRIBE_VAD", "1") == "1"
+        self.vad = VoiceActivityDetector()
+        self.vad_min_savings = 0.1
+        self.vad_counters = {"runs": 0, "skipped": 0, "seconds_in": 0.0, "seconds_kept": 0.0}
     
     def _find_ffmpeg(self):
         """Find ffmpeg executable"""
@@ -31,256 +73,488 @@ class TranscriptionService:
                     return str(matches[0])
         return None
     
-    def _get_audio_duration(self, audio_path: str) -> float:
-        """Get audio duration in seconds using ffprobe"""
-        if not self.ffmpeg_path:
-            return 0.0
-        
-        # Try to find ffprobe (cross-platform)
-        ffprobe_path = None
-        ffmpeg_dir = Path(self.ffmpeg_path).parent
-        
-        # Try platform-specific extensions
-        if os.name == 'nt':  # Windows
-            ffprobe_path = ffmpeg_dir / 'ffprobe.exe'
-            if not ffprobe_path.exists():
-                ffprobe_path = None
-        else:  # Linux/Mac
-            ffprobe_path = ffmpeg_dir / 'ffprobe'
-            if not ffprobe_path.exists():
-                ffprobe_path = None
-        
-        # Try system PATH
-        if not ffprobe_path or not ffprobe_path.exists():
-            ffprobe_system = shutil.which('ffprobe')
-            if ffprobe_system:
-                ffprobe_path = Path(ffprobe_system)
-            else:
-                return 0.0
-        
+    def _write_chunk(self, pcm: PCMAudio, chunk: Dict, work_dir: Path,
+                     max_file_size: Optional[int]) -> str:
+        """Cut a chunk out of the PCM as a WAV file; encode it only if it's over the upload limit"""
+        wav_path = work_dir / f"chunk_{chunk['index']}.wav"
         try:
-            cmd = [
-                str(ffprobe_path),
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                audio_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=10)
-            return float(result.stdout.strip())
-        except:
-            return 0.0
+            pcm.write_slice(str(wav_path), chunk["start"], chunk["end"])
+            if max_file_size is None or os.path.getsize(wav_path) <= max_file_size:
+                return str(wav_path)
+            mp3_path = self._encode_mp3(str(wav_path), str(work_dir / f"chunk_{chunk['index']}.mp3"))
+        except Exception:
+            if wav_path.exists():
+                os.remove(wav_path)
+            raise
+        os.remove(wav_path)
+        return mp3_path
     
-    def _split_audio_chunk(self, audio_path: str, start_time: float, duration: float, output_path: str) -> str:
-        """Extract a chunk of audio from the file"""
+    def _encode_mp3(self, audio_path: str, output_path: str) -> str:
+        """Compress audio for upload (only for API backends with a file size limit)"""
         if not self.ffmpeg_path:
-            raise RuntimeError("ffmpeg not found. Cannot split audio file.")
+            raise RuntimeError("ffmpeg not found. Cannot encode audio file.")
         
         cmd = [
             self.ffmpeg_path,
             '-i', audio_path,
-            '-ss', str(start_time),
-            '-t', str(duration),
             '-acodec', 'libmp3lame',
             '-ab', '48k',  # Lower bitrate for smaller files
-            '-ar', '12000',  # Lower sample rate (sufficient for speech)
-            '-ac', '1',  # Mono
+            '-ac', '1',  # Mono (sufficient for speech)
             '-y',  # Overwrite
             str(output_path)
         ]
-        subprocess.run(cmd, capture_output=True, check=True, timeout=300)
+        try:
+            subprocess.run(cmd, capture_output=True, check=True, timeout=600)
+        except Exception:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
         return str(output_path)
     
-    def _convert_to_mp3_sync(self, audio_path: str) -> str:
-        """Convert audio file to MP3 format synchronously"""
-        audio_file = Path(audio_path)
+    def get_backend(self, name: Optional[str] = None) -> TranscriptionBackend:
+        """Get a backend by name (default: TRANSCRIBE_BACKEND); raises ValueError for unknown names"""
+        name = name or self.default_backend
+        backend = self.backends.get(name)
+        if backend is None:
+            backend = create_backend(name)
+            self.backends[name] = backend
+        return backend
+    
+    def backend_stats(self) -> Dict:
+        """Stats of every backend created so far (e.g. the local model pool)"""
+        return {name: backend.stats() for name, backend in self.backends.items() if backend.stats() is not None}
+    
+    def _cache_params(self, backend: TranscriptionBackend) -> Dict:
+        """Parameters that affect transcription output (part of the cache key)"""
+        params = backend.cache_params()
+        params.update({
+            "max_file_size": backend.max_file_size,
+            "chunk_seconds": self.chunk_seconds,
+            "chunk_overlap": self.chunk_overlap,
+        })
+        if self.vad_enabled:
+            params["vad"] = self.vad.params()
+        return params
+    
+    async def transcribe_with_timestamps(self, audio_path: str, use_cache: bool = True,
+                                         backend: Optional[str] = None,
+                                         on_chunk: Optional[ChunkCallback] = None) -> List[Dict]:
+        """Transcribe audio file with timestamps using the chosen (or default) backend.
         
-        # If already MP3 and under size limit, return as-is
-        if audio_file.suffix.lower() == '.mp3':
-            file_size = os.path.getsize(audio_path)
-            if file_size <= self.max_file_size:
-                return audio_path
+        on_chunk receives partial results while a chunked transcription runs.
+        With the cache on, chunked runs are checkpointed under the cache key:
+        a rerun only transcribes the chunks that failed or never finished.
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        engine = self.get_backend(backend)
         
-        # Convert to MP3
-        output_path = audio_file.parent / f"{audio_file.stem}_converted.mp3"
+        if not use_cache:
+            transcript, report = await self._transcribe_uncached(audio_path, engine, self._tag_chunk_callback(on_chunk, None))
+            self._record_report(audio_path, report)
+            return transcript
         
-        if not self.ffmpeg_path:
-            raise RuntimeError("ffmpeg not found. Cannot convert audio file.")
+        # Hashing a long recording takes a moment, keep it off the event loop
+        loop = asyncio.get_event_loop()
+        cache_key = await loop.run_in_executor(
+            None, self.transcript_cache.make_key, audio_path, self._cache_params(engine)
+        )
+        cached = await loop.run_in_executor(None, self.transcript_cache.get, cache_key)
+        if cached is not None:
+            self._record_report(audio_path, None)
+            return cached
         
-        cmd = [
-            self.ffmpeg_path,
-            '-i', audio_path,
-            '-acodec', 'libmp3lame',
-            '-ab', '64k',  # Lower bitrate to reduce file size
-            '-ar', '16000',  # Lower sample rate (sufficient for speech)
-            '-ac', '1',  # Mono (sufficient for speech)
-            '-y',  # Overwrite
-            str(output_path)
-        ]
-        subprocess.run(cmd, capture_output=True, check=True, timeout=600)
-        return str(output_path)
+        transcript, report = await self._transcribe_uncached(
+            audio_path, engine, self._tag_chunk_callback(on_chunk, cache_key), cache_key
+        )
+        self._record_report(audio_path, report)
+        
+        # Never cache a transcript with holes in it; its checkpoint keeps the failed ranges for a retry
+        if not report or not report["failed"]:
+            await loop.run_in_executor(None, self.transcript_cache.put, cache_key, transcript)
+            await loop.run_in_executor(None, self.checkpoints.delete, cache_key)
+        else:
+            await loop.run_in_executor(None, self.checkpoints.record_failures, cache_key, report["failed"])
+        return transcript
     
-    async def transcribe_with_timestamps(self, audio_path: str) -> List[Dict]:
-        """Transcribe audio file with timestamps using OpenAI Whisper"""
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+    def _record_report(self, audio_path: str, report: Optional[Dict]):
+        if report:
+            self.chunk_reports[os.path.abspath(audio_path)] = report
+        else:
+            self.chunk_reports.pop(os.path.abspath(audio_path), None)
+    
+    def get_chunk_report(self, audio_path: str) -> Optional[Dict]:
+        """Get the chunk report from the last chunked transcription of a file"""
+        return self.chunk_reports.get(os.path.abspath(audio_path))
+    
+    def cache_key(self, audio_path: str, backend: Optional[str] = None) -> str:
+        """Cache key (and chunk "run") of a file's transcription with a backend (blocking: hashes the audio)"""
+        return self.transcript_cache.make_key(audio_path, self._cache_params(self.get_backend(backend)))
+    
+    def get_checkpoint(self, audio_path: str, backend: Optional[str] = None) -> Optional[Dict]:
+        """Manifest of an unfinished chunked transcription of a file (blocking: hashes the audio)"""
+        return self.checkpoints.get(self.cache_key(audio_path, backend))
+    
+    async def _transcribe_uncached(self, audio_path: str, backend: TranscriptionBackend,
+                                   on_chunk: Optional[ChunkCallback] = None,
+                                   checkpoint_key: Optional[str] = None) -> Tuple[List[Dict], Optional[Dict]]:
+        """Transcribe audio file, stripping silence first when VAD is enabled.
+        
+        Only the speech is sent to the backend; timestamps (and the chunk
+        report) are mapped back onto the original recording's timeline.
+        """
+        if not self.vad_enabled:
+            return await self._transcribe_file(audio_path, backend, on_chunk, checkpoint_key)
+        
+        loop = asyncio.get_event_loop()
+        work_dir = Path(tempfile.mkdtemp(prefix=f"{Path(audio_path).stem}_vad_", dir=Path(audio_path).parent))
+        try:
+            prepared = await loop.run_in_executor(None, self._strip_silence, audio_path, work_dir)
+            if prepared is None:
+                return await self._transcribe_file(audio_path, backend, on_chunk, checkpoint_key)
+            
+            speech_path, time_map = prepared
+            transcript, report = await self._transcribe_file(
+                str(speech_path), backend, self._map_chunk_callback(on_chunk, time_map), checkpoint_key
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        time_map.map_segments(transcript)
+        if report:
+            for failure in report["failed"]:
+                failure["start"] = time_map.to_original(failure["start"])
+                failure["end"] = time_map.to_original(failure["end"])
+        return transcript, report
+    
+    @staticmethod
+    def _tag_chunk_callback(on_chunk: Optional[ChunkCallback], run: Optional[str]) -> Optional[ChunkCallback]:
+        """Wrap a chunk callback so every chunk names the run it belongs to"""
+        if on_chunk is None:
+            return None
+        
+        def tagged(chunk: Dict, segments: List[Dict], num_chunks: int):
+            on_chunk(dict(chunk, run=run), segments, num_chunks)
+        return tagged
+    
+    @staticmethod
+    def _map_chunk_callback(on_chunk: Optional[ChunkCallback], time_map: TimeMap) -> Optional[ChunkCallback]:
+        """Wrap a chunk callback so it sees original-timeline times (on copies: the
+        chunk's own segments are mapped again when the transcript is complete)"""
+        if on_chunk is None:
+            return None
+        
+        def mapped(chunk: Dict, segments: List[Dict], num_chunks: int):
+            segments = copy.deepcopy(segments)
+            time_map.map_segments(segments)
+            chunk = dict(chunk, start=time_map.to_original(chunk["start"]), end=time_map.to_original(chunk["end"]))
+            on_chunk(chunk, segments, num_chunks)
+        return mapped
+    
+    def _strip_silence(self, audio_path: str, work_dir: Path) -> Optional[Tuple[Path, TimeMap]]:
+        """Write the speech-only version of a file, or return None if it isn't worth it"""
+        try:
+            pcm = self.pcm_store.open(audio_path)
+            regions = self.vad.detect(pcm.samples)
+        except Exception as e:
+            print(f"Voice activity detection failed, transcribing the full file: {str(e)}")
+            return None
+        
+        duration = pcm.duration
+        kept = sum(end - start for start, end in regions)
+        # Nothing detected (or almost nothing removed): send the original as it is
+        if not regions or kept > duration * (1 - self.vad_min_savings):
+            self.vad_counters["skipped"] += 1
+            return None
+        
+        speech_path = work_dir / "speech.wav"
+        time_map = self.vad.condense(pcm.samples, regions, speech_path)
+        self.vad_counters["runs"] += 1
+        self.vad_counters["seconds_in"] += duration
+        self.vad_counters["seconds_kept"] += kept
+        print(f"VAD: kept {kept/60:.1f} of {duration/60:.1f} minutes "
+              f"({100 * (1 - kept / duration):.0f}% silence removed)")
+        return speech_path, time_map
+    
+    def vad_stats(self) -> Dict:
+        """How much audio the VAD pre-pass has removed"""
+        stats = dict(self.vad_counters, enabled=self.vad_enabled)
+        if stats["seconds_in"]:
+            stats["removed_ratio"] = round(1 - stats["seconds_kept"] / stats["seconds_in"], 3)
+        return stats
+    
+    async def _transcribe_file(self, audio_path: str, backend: TranscriptionBackend,
+                               on_chunk: Optional[ChunkCallback] = None,
+                               checkpoint_key: Optional[str] = None) -> Tuple[List[Dict], Optional[Dict]]:
+        """Transcribe audio file, converting or splitting it as the backend requires.
+        
+        Backends that read PCM get the canonical decode; API backends get the
+        file as it is when they accept it, else the PCM (cut into chunks when
+        over their size limit). Returns the transcript and, for chunked
+        files, a chunk report.
+        """
+        loop = asyncio.get_event_loop()
+        if backend.accepts_pcm:
+            pcm_path = await loop.run_in_executor(None, self.pcm_store.ensure, audio_path)
+            return await self._transcribe_single_file(pcm_path, backend), None
         
         # Check file size and format
         file_size = os.path.getsize(audio_path)
         file_ext = Path(audio_path).suffix.lower()
-        supported_formats = ['.mp3', '.mp4', '.mpeg', '.mpga', '.m4a', '.wav', '.webm']
         
-        # Convert if needed (wrong format)
-        if file_ext not in supported_formats:
-            print(f"Converting audio file format ({file_ext})...")
-            audio_path = await asyncio.get_event_loop().run_in_executor(
-                None, self._convert_to_mp3_sync, audio_path
-            )
+        # Wrong format: the canonical PCM is a WAV, which API backends take without re-encoding
+        if backend.supported_formats is not None and file_ext not in backend.supported_formats:
+            print(f"Decoding audio file format ({file_ext}) to PCM...")
+            audio_path = await loop.run_in_executor(None, self.pcm_store.ensure, audio_path)
             file_size = os.path.getsize(audio_path)
+            if '.wav' not in backend.supported_formats:
+                raise RuntimeError(f"Backend '{backend.name}' accepts neither {file_ext} nor WAV audio")
         
         # If file is too large, split into chunks
-        if file_size > self.max_file_size:
+        if backend.max_file_size is not None and file_size > backend.max_file_size:
             print(f"File too large ({file_size / 1024 / 1024:.2f}MB). Splitting into chunks...")
-            return await self._transcribe_large_file(audio_path)
+            return await self._transcribe_large_file(audio_path, backend, on_chunk, checkpoint_key)
         
         # Process normally for smaller files
-        return await self._transcribe_single_file(audio_path)
+        return await self._transcribe_single_file(audio_path, backend), None
     
-    async def _transcribe_large_file(self, audio_path: str) -> List[Dict]:
-        """Transcribe large audio file by splitting into chunks"""
-        # Get audio duration
-        duration = await asyncio.get_event_loop().run_in_executor(
-            None, self._get_audio_duration, audio_path
-        )
+    def _plan_chunks(self, duration: float, silences: List[Tuple[float, float]]) -> List[Dict]:
+        """Plan balanced chunks whose boundaries sit in the nearest silence.
+        
+        Each chunk owns [keep_start, keep_end) of the original timeline and is
+        extracted from [start, end), which adds chunk_overlap on either side so
+        words at a boundary are heard whole by at least one chunk.
+        """
+        num_chunks = max(1, math.ceil(duration / self.chunk_seconds))
+        step = duration / num_chunks
+        quiet_points = sorted((start + end) / 2 for start, end in silences)
+        
+        cuts = [0.0]
+        for k in range(1, num_chunks):
+            ideal = k * step
+            cut = ideal
+            # Nearest quiet point to the ideal cut, without starving either neighbour
+            pos = bisect.bisect_left(quiet_points, ideal)
+            candidates = [p for p in quiet_points[max(0, pos - 1):pos + 1]
+                          if abs(p - ideal) <= self.boundary_window and p - cuts[-1] >= step / 2]
+            if candidates:
+                cut = min(candidates, key=lambda p: abs(p - ideal))
+            cuts.append(cut)
+        cuts.append(duration)
+        
+        chunks = []
+        for index in range(num_chunks):
+            keep_start, keep_end = cuts[index], cuts[index + 1]
+            chunks.append({
+                "index": index,
+                "keep_start": keep_start,
+                "keep_end": keep_end,
+                "start": max(0.0, keep_start - self.chunk_overlap) if index > 0 else 0.0,
+                "end": min(duration, keep_end + self.chunk_overlap) if index < num_chunks - 1 else duration
+            })
+        return chunks
+    
+    def _merge_chunk_segments(self, chunk_results: List[Tuple[Dict, List[Dict]]]) -> List[Dict]:
+        """Merge per-chunk segments (already on the original timeline) in order.
         
-        if duration == 0:
-            # Fallback: estimate from file size (rough estimate: 1MB ≈ 1 minute at 64kbps)
-            file_size_mb = os.path.getsize(audio_path) / 1024 / 1024
-            duration = file_size_mb * 60  # Rough estimate
+        A segment belongs to the chunk whose keep range contains its midpoint,
+        which drops most of what both chunks heard in an overlap. A segment
+        that straddles the seam and was transcribed by both chunks is
+        recognised by its text and kept once.
+        """
+        merged = []
+        last_index = len(chunk_results) - 1
+        for position, (chunk, segments) in enumerate(sorted(chunk_results, key=lambda r: r[0]["index"])):
+            keep_start = chunk["keep_start"] if chunk["index"] > 0 else float("-inf")
+            keep_end = chunk["keep_end"] if position < last_index else float("inf")
+            owned = [
+                segment for segment in segments
+                if segment.get("text") and keep_start <= (segment["start"] + segment["end"]) / 2 < keep_end
+            ]
+            owned.sort(key=lambda x: x['start'])
+            
+            # Reconcile the seam with the previous chunk
+            while merged and owned and owned[0]["start"] < merged[-1]["end"]:
+                previous_text = self._normalize_text(merged[-1]["text"])
+                next_text = self._normalize_text(owned[0]["text"])
+                if next_text in previous_text:
+                    owned.pop(0)
+                elif previous_text in next_text:
+                    merged.pop()
+                else:
+                    break
+            merged.extend(owned)
+        return merged
+    
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+    
+    async def _transcribe_large_file(self, audio_path: str, backend: TranscriptionBackend,
+                                     on_chunk: Optional[ChunkCallback] = None,
+                                     checkpoint_key: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+        """Transcribe large audio file by splitting it into chunks.
         
-        # Calculate chunk size (aim for ~20MB chunks to be safe)
-        # At 64kbps mono, ~20MB ≈ 40 minutes
-        chunk_duration = 40 * 60  # 40 minutes in seconds
-        num_chunks = int(duration / chunk_duration) + 1
+        Chunk boundaries are placed in silences (with a small overlap) so cuts
+        don't land mid-word. Chunks are sliced out of the memory-mapped PCM in
+        a thread pool (no re-encoding unless a chunk exceeds the backend's
+        upload limit) and transcribed concurrently (bounded by
+        max_concurrency). Each chunk is retried on its own; failures end up
+        in the report. Finished chunks are handed to on_chunk right away and,
+        with a checkpoint_key, saved so a rerun of the same plan skips them.
+        """
+        loop = asyncio.get_event_loop()
         
-        print(f"Audio duration: {duration/60:.1f} minutes. Splitting into {num_chunks} chunks...")
+        # One decode gives both the exact duration and the silences
+        pcm = await loop.run_in_executor(None, self.pcm_store.open, audio_path)
+        duration = pcm.duration
+        silences = await loop.run_in_executor(
+            None, find_silences, pcm.samples, self.silence_noise_db, self.silence_min_duration
+        )
         
-        all_segments = []
+        chunks = self._plan_chunks(duration, silences)
+        restored = {}
+        if checkpoint_key:
+            restored = await loop.run_in_executor(None, self.checkpoints.start, checkpoint_key, chunks)
+        
+        print(f"Audio duration: {duration/60:.1f} minutes. Splitting into {len(chunks)} chunks "
+              f"at {len(silences)} detected silences (up to {self.max_concurrency} at a time)...")
+        if restored:
+            print(f"Resuming from checkpoint: {len(restored)} of {len(chunks)} chunks already transcribed")
+        
+        # Each run gets its own directory so concurrent runs never share chunk files
         audio_dir = Path(audio_path).parent
-        base_name = Path(audio_path).stem
+        work_dir = Path(tempfile.mkdtemp(prefix=f"{Path(audio_path).stem}_chunks_", dir=audio_dir))
+        semaphore = asyncio.Semaphore(min(self.max_concurrency, backend.max_concurrency or self.max_concurrency))
         
-        # Process each chunk
-        for i in range(num_chunks):
-            start_time = i * chunk_duration
-            chunk_dur = min(chunk_duration, duration - start_time)
-            
-            if chunk_dur <= 0:
-                break
-            
-            print(f"Processing chunk {i+1}/{num_chunks} (time: {start_time/60:.1f}-{(start_time+chunk_dur)/60:.1f} min)...")
-            
-            # Create chunk file
-            chunk_path = audio_dir / f"{base_name}_chunk_{i}.mp3"
-            
-            # Extract chunk
-            await asyncio.get_event_loop().run_in_executor(
-                None, self._split_audio_chunk, audio_path, start_time, chunk_dur, str(chunk_path)
-            )
-            
-            # Transcribe chunk
-            try:
-                chunk_segments = await self._transcribe_single_file(str(chunk_path))
-                
-                # Adjust timestamps by adding chunk start time
-                for segment in chunk_segments:
-                    segment['start'] += start_time
-                    segment['end'] += start_time
-                
-                all_segments.extend(chunk_segments)
-            except Exception as e:
-                print(f"Error transcribing chunk {i+1}: {str(e)}")
-                # Continue with other chunks
-            finally:
-                # Clean up chunk file
+        async def run(chunk: Dict) -> Tuple[List[Dict], Optional[str], int]:
+            if chunk["index"] in restored:
+                segments = restored[chunk["index"]]
+                if on_chunk is not None:
+                    self._publish_chunk(on_chunk, chunk, segments, len(chunks))
+                return segments, None, 0
+            result = await self._transcribe_chunk(pcm, work_dir, chunk, len(chunks), backend, semaphore, on_chunk)
+            if checkpoint_key and result[1] is None:
                 try:
-                    if chunk_path.exists():
-                        os.remove(chunk_path)
-                except:
-                    pass
+                    await loop.run_in_executor(None, self.checkpoints.save_chunk, checkpoint_key, chunk, result[0])
+                except OSError as e:
+                    print(f"Checkpointing chunk {chunk['index']+1} failed: {str(e)}")
+            return result
         
-        # Sort segments by start time
-        all_segments.sort(key=lambda x: x['start'])
+        try:
+            results = await asyncio.gather(*[run(chunk) for chunk in chunks])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        completed = []
+        failed = []
+        for chunk, (chunk_segments, error, attempts) in zip(chunks, results):
+            if error is None:
+                completed.append((chunk, chunk_segments))
+            else:
+                failed.append({
+                    "index": chunk["index"],
+                    "start": chunk["keep_start"],
+                    "end": chunk["keep_end"],
+                    "attempts": attempts,
+                    "error": error
+                })
         
+        if failed and len(failed) == len(chunks):
+            raise RuntimeError(f"All {len(chunks)} chunks failed to transcribe: {failed[0]['error']}")
+        
+        all_segments = self._merge_chunk_segments(completed)
+        
+        report = {
+            "total_chunks": len(chunks),
+            "completed": len(chunks) - len(failed),
+            "restored": len(restored),
+            "failed": failed
+        }
+        if failed:
+            print(f"Transcription incomplete: chunks {[f['index'] + 1 for f in failed]} failed")
         print(f"Transcription complete. Total segments: {len(all_segments)}")
-        return all_segments
+        return all_segments, report
     
-    async def _transcribe_single_file(self, audio_path: str) -> List[Dict]:
-        """Transcribe a single audio file"""
-        def transcribe():
-            # Try with verbose_json first for timestamps, fallback to simple format
+    async def _transcribe_chunk(self, pcm: PCMAudio, work_dir: Path, chunk: Dict, num_chunks: int,
+                                backend: TranscriptionBackend, semaphore: asyncio.Semaphore,
+                                on_chunk: Optional[ChunkCallback] = None) -> Tuple[List[Dict], Optional[str], int]:
+        """Cut and transcribe one chunk, retrying on failure.
+        
+        Returns (segments on the original timeline, error or None, attempts made).
+        """
+        loop = asyncio.get_event_loop()
+        index = chunk["index"]
+        start_time = chunk["start"]
+        chunk_dur = chunk["end"] - chunk["start"]
+        chunk_path = None
+        error = None
+        attempts = 0
+        
+        try:
+            while attempts <= self.chunk_retries:
+                attempts += 1
+                try:
+                    if chunk_path is None:
+                        chunk_path = await loop.run_in_executor(
+                            self.split_executor, self._write_chunk,
+                            pcm, chunk, work_dir, backend.max_file_size
+                        )
+                    
+                    async with semaphore:
+                        print(f"Transcribing chunk {index+1}/{num_chunks} "
+                              f"(time: {start_time/60:.1f}-{(start_time+chunk_dur)/60:.1f} min)...")
+                        chunk_segments = await self._transcribe_single_file(chunk_path, backend)
+                    
+                    # Adjust timestamps by adding chunk start time
+                    for segment in chunk_segments:
+                        segment['start'] += start_time
+                        segment['end'] += start_time
+                        for word in segment.get('words', ()):
+                            word['start'] += start_time
+                            word['end'] += start_time
+                    if on_chunk is not None:
+                        self._publish_chunk(on_chunk, chunk, chunk_segments, num_chunks)
+                    return chunk_segments, None, attempts
+                except Exception as e:
+                    error = str(e)
+                    print(f"Error transcribing chunk {index+1} (attempt {attempts}): {error}")
+                    if attempts <= self.chunk_retries:
+                        await asyncio.sleep(self.retry_backoff * 2 ** (attempts - 1))
+        finally:
+            # Clean up chunk file
             try:
-                with open(audio_path, "rb") as audio_file:
-                    # Try with verbose_json for timestamps
-                    transcript = self.client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        response_format="verbose_json"
-                    )
-                    return transcript
-            except Exception as e:
-                # If verbose_json fails, try simple format
-                print(f"verbose_json failed, trying simple format: {str(e)}")
-                with open(audio_path, "rb") as audio_file:
-                    transcript = self.client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file
-                    )
-                    # Convert simple response to verbose format
-                    if hasattr(transcript, 'text'):
-                        return {"text": transcript.text, "segments": []}
-                    elif isinstance(transcript, dict) and 'text' in transcript:
-                        return {"text": transcript['text'], "segments": []}
-                    return transcript
+                if chunk_path and os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+            except OSError:
+                pass
         
+        return [], error, attempts
+    
+    @staticmethod
+    def _publish_chunk(on_chunk: ChunkCallback, chunk: Dict, segments: List[Dict], num_chunks: int):
+        """Hand a finished chunk's own segments (overlap with its neighbours dropped) to a callback"""
+        keep_start = chunk["keep_start"] if chunk["index"] > 0 else float("-inf")
+        keep_end = chunk["keep_end"] if chunk["index"] < num_chunks - 1 else float("inf")
+        owned = sorted(
+            (segment for segment in segments
+             if segment.get("text") and keep_start <= (segment["start"] + segment["end"]) / 2 < keep_end),
+            key=lambda segment: segment["start"]
+        )
+        try:
+            on_chunk({"index": chunk["index"], "start": chunk["keep_start"], "end": chunk["keep_end"]},
+                     owned, num_chunks)
+        except Exception as e:
+            # Partial results are best effort; never fail the chunk over them
+            print(f"Publishing chunk {chunk['index']+1} failed: {str(e)}")
+    
+    async def _transcribe_single_file(self, audio_path: str, backend: TranscriptionBackend) -> List[Dict]:
+        """Transcribe a single audio file"""
         # Run in thread pool
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, transcribe)
-        
-        # Format transcript with timestamps
-        formatted_transcript = []
-        
-        # Process segments - handle both dict and object responses
-        if isinstance(result, dict):
-            # If response is a dict
-            if 'segments' in result and result['segments']:
-                for segment in result['segments']:
-                    formatted_transcript.append({
-                        "start": segment.get('start', 0.0),
-                        "end": segment.get('end', 0.0),
-                        "text": segment.get('text', '').strip()
-                    })
-            elif 'text' in result:
-                # Fallback: single segment
-                formatted_transcript.append({
-                    "start": 0.0,
-                    "end": 0.0,
-                    "text": result.get('text', '').strip()
-                })
-        else:
-            # If response is an object
-            if hasattr(result, 'segments') and result.segments:
-                for segment in result.segments:
-                    formatted_transcript.append({
-                        "start": getattr(segment, 'start', 0.0),
-                        "end": getattr(segment, 'end', 0.0),
-                        "text": getattr(segment, 'text', '').strip()
-                    })
-            elif hasattr(result, 'text'):
-                formatted_transcript.append({
-                    "start": 0.0,
-                    "end": 0.0,
-                    "text": getattr(result, 'text', '').strip()
-                })
+        segments, words = await loop.run_in_executor(None, backend.transcribe, audio_path)
         
-        return formatted_transcript if formatted_transcript else [{"start": 0.0, "end": 0.0, "text": ""}]
-
+        # Word timings (when the backend returned them) are kept per segment with their character spans
+        assign_words(segments, words)
+        
+        return segments if segments else [{"start": 0.0, "end": 0.0, "text": ""}]
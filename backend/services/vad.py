@@ -0,0 +1,165 @@
+import bisect
+import wave
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from utils.pcm_audio import SAMPLE_RATE
+
+
+def frame_levels(samples: np.ndarray, frame_samples: int) -> np.ndarray:
+    """RMS level in dBFS of each whole frame of int16 samples"""
+    frame_count = len(samples) // frame_samples
+    frames = samples[:frame_count * frame_samples].reshape(frame_count, frame_samples)
+    rms = np.empty(frame_count)
+    # A few thousand frames at a time, so a memory-mapped recording is never widened whole
+    for lo in range(0, frame_count, 8192):
+        block = frames[lo:lo + 8192]
+        rms[lo:lo + len(block)] = np.sqrt(np.mean(np.square(block, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+
+
+def find_silences(samples: np.ndarray, noise_dbfs: float, min_duration: float,
+                  frame_ms: int = 30) -> List[Tuple[float, float]]:
+    """(start, end) of stretches quieter than noise_dbfs lasting at least min_duration"""
+    frame_samples = SAMPLE_RATE * frame_ms // 1000
+    if len(samples) < frame_samples:
+        return []
+    quiet = frame_levels(samples, frame_samples) < noise_dbfs
+    frame_seconds = frame_samples / SAMPLE_RATE
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.astype(np.int8), [0]))))
+    return [
+        (float(on) * frame_seconds, float(off) * frame_seconds)
+        for on, off in zip(edges[::2], edges[1::2])
+        if (off - on) * frame_seconds >= min_duration
+    ]
+
+
+class TimeMap:
+    """Maps times in condensed (speech-only) audio back to the original recording.
+
+    Each span is (condensed_start, original_start, length): the stretch of
+    condensed audio starting at condensed_start is the original audio
+    starting at original_start. Times falling in the short gaps inserted
+    between spans map to the nearest span edge.
+    """
+
+    def __init__(self, spans: List[Tuple[float, float, float]]):
+        self.spans = spans
+        self._starts = [span[0] for span in spans]
+
+    def to_original(self, t: float) -> float:
+        if not self.spans:
+            return t
+        index = max(bisect.bisect_right(self._starts, t) - 1, 0)
+        condensed_start, original_start, length = self.spans[index]
+        offset = min(max(t - condensed_start, 0.0), length)
+        return round(original_start + offset, 3)
+
+    def map_segments(self, segments: List[Dict]):
+        """Rewrite segment (and word) times in place onto the original timeline"""
+        for segment in segments:
+            segment["start"] = self.to_original(segment["start"])
+            segment["end"] = max(self.to_original(segment["end"]), segment["start"])
+            for word in segment.get("words", ()):
+                word["start"] = self.to_original(word["start"])
+                word["end"] = max(self.to_original(word["end"]), word["start"])
+
+
+class VoiceActivityDetector:
+    """Energy-based voice activity detection over 16 kHz mono PCM.
+
+    Frames whose RMS level rises clearly above the recording's noise floor
+    count as speech; speech runs are held for a few frames, padded and
+    bridged across short pauses, so words aren't clipped and normal pauses
+    between sentences survive. Recordings without clear silence (no quiet
+    low mode in their levels) are kept whole rather than guessed at.
+    """
+
+    def __init__(self, frame_ms: int = 30, threshold_db: float = 12.0, floor_dbfs: float = -50.0,
+                 max_noise_dbfs: float = -45.0, min_contrast_db: float = 20.0, hangover_frames: int = 8,
+                 padding: float = 0.3, min_silence: float = 1.0, min_speech: float = 0.25,
+                 gap: float = 0.3):
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self.threshold_db = threshold_db  # how far above the noise floor speech must be
+        self.floor_dbfs = floor_dbfs  # never treat anything quieter than this as speech
+        self.max_noise_dbfs = max_noise_dbfs  # a floor estimate above this isn't silence
+        self.min_contrast_db = min_contrast_db  # how far below the median level real silence sits
+        self.hangover_frames = hangover_frames  # frames still counted as speech after it drops
+        self.padding = padding  # seconds kept around each speech run
+        self.min_silence = min_silence  # pauses shorter than this are kept
+        self.min_speech = min_speech  # blips shorter than this are dropped
+        self.gap = gap  # silence inserted between kept regions in the condensed audio
+
+    def params(self) -> Dict:
+        """Settings that change the condensed audio (for cache keys)"""
+        return {
+            "frame_samples": self.frame_samples,
+            "threshold_db": self.threshold_db,
+            "floor_dbfs": self.floor_dbfs,
+            "max_noise_dbfs": self.max_noise_dbfs,
+            "min_contrast_db": self.min_contrast_db,
+            "hangover_frames": self.hangover_frames,
+            "padding": self.padding,
+            "min_silence": self.min_silence,
+            "min_speech": self.min_speech,
+            "gap": self.gap,
+        }
+
+    def detect(self, samples: np.ndarray) -> List[Tuple[float, float]]:
+        """Speech regions (start, end) in seconds for int16 mono samples.
+
+        A recording with no clear silence comes back as one region covering it all.
+        """
+        if len(samples) < self.frame_samples:
+            return []
+        level = frame_levels(samples, self.frame_samples)
+        duration = len(samples) / SAMPLE_RATE
+
+        # The quietest tenth of the recording approximates its noise floor - but only
+        # if that tenth is actual silence: quiet in absolute terms and well below the
+        # typical level. Continuous speech with soft passages has no such low mode.
+        noise_floor, median = (float(value) for value in np.percentile(level, [10, 50]))
+        if noise_floor > self.max_noise_dbfs or median - noise_floor < self.min_contrast_db:
+            return [(0.0, duration)]
+        threshold = max(noise_floor + self.threshold_db, self.floor_dbfs)
+        speech = level > threshold
+        if self.hangover_frames:
+            # Speech holds for hangover_frames after the level drops (word endings, soft consonants)
+            held = np.convolve(speech.astype(np.int32), np.ones(self.hangover_frames + 1, dtype=np.int32))
+            speech = held[:len(speech)] > 0
+
+        frame_seconds = self.frame_samples / SAMPLE_RATE
+        # Run boundaries: indices where speech flips on/off
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+        regions = []
+        for on, off in zip(edges[::2], edges[1::2]):
+            start = max(0.0, float(on) * frame_seconds - self.padding)
+            end = min(duration, float(off) * frame_seconds + self.padding)
+            if regions and start - regions[-1][1] < self.min_silence:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+        return [(start, end) for start, end in regions if end - start >= self.min_speech]
+
+    def condense(self, samples: np.ndarray, regions: List[Tuple[float, float]],
+                 output_path: Path) -> TimeMap:
+        """Write the speech regions back to back (with short gaps) as a WAV file"""
+        gap = np.zeros(int(self.gap * SAMPLE_RATE), dtype=np.int16)
+        spans = []
+        condensed_position = 0.0
+        with wave.open(str(output_path), "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            for index, (start, end) in enumerate(regions):
+                if index:
+                    out.writeframes(gap.tobytes())
+                    condensed_position += len(gap) / SAMPLE_RATE
+                piece = samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+                out.writeframes(piece.astype("<i2", copy=False).tobytes())
+                spans.append((condensed_position, start, len(piece) / SAMPLE_RATE))
+                condensed_position += len(piece) / SAMPLE_RATE
+        return TimeMap(spans)
+
@@ -5,6 +5,8 @@ from pathlib import Path
 import subprocess
 import shutil
 
+from services.caption_parser import parse_caption_file
+
 
 class YouTubeService:
     def __init__(self):
@@ -62,6 +64,27 @@ class YouTubeService:
                 return match.group(1)
         return None
     
+    async def probe_info(self, url: str) -> dict:
+        """Fetch video metadata without downloading anything"""
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'skip_download': True,
+            'no_check_certificate': True,
+        }
+        
+        def probe():
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+                return {
+                    "title": info.get('title', 'Unknown'),
+                    "duration": info.get('duration', 0),
+                }
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, probe)
+    
     async def fetch_and_extract_audio(self, url: str, video_id: str) -> dict:
         """Fetch YouTube video and extract audio only"""
         audio_path = self.cache_dir / f"{video_id}.mp3"
@@ -129,103 +152,72 @@ class YouTubeService:
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, download)
 
-        # After download, check for any subtitle files (creator-provided)
+        captions_segments = self.load_captions(video_id)
+        if captions_segments:
+            result['captions'] = captions_segments
+
+        return result
+
+    async def fetch_captions(self, url: str, video_id: str) -> dict:
+        """Fetch video metadata and creator subtitles only - no audio download.
+
+        Takes about a second instead of a full download and transcode; the
+        result has "captions" (parsed segments) when the video has creator
+        subtitles.
+        """
+        self._clear_subtitles(video_id)
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'skip_download': True,  # subtitle files are still written
+            'no_check_certificate': True,
+            'outtmpl': str(self.cache_dir / f"{video_id}.%(ext)s"),
+            'writesubtitles': True,
+            'writeautomaticsub': False,
+            'subtitlesformat': 'vtt',
+        }
+
+        def probe():
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
+                return {
+                    "title": info.get('title', 'Unknown'),
+                    "duration": info.get('duration', 0),
+                }
+
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(None, probe)
+
+        captions_segments = self.load_captions(video_id)
+        if captions_segments:
+            result['captions'] = captions_segments
+        return result
+
+    def load_captions(self, video_id: str):
+        """Parse the creator subtitle file (.vtt or .srt) written for a video, if any"""
         # Look for .vtt or .srt files for this video_id in the cache dir
-        captions_segments = None
         try:
             for ext in ('.vtt', '.srt'):
-                # match files like video_id*.vtt
-                matches = list(self.cache_dir.glob(f"{video_id}*{ext}"))
+                # match files like video_id.en.vtt
+                matches = sorted(self.cache_dir.glob(f"{video_id}.*{ext}"))
                 if matches:
                     # Prefer the first match
-                    subtitle_path = matches[0]
-                    try:
-                        text = subtitle_path.read_text(encoding='utf-8')
-                    except Exception:
-                        text = subtitle_path.read_text(encoding='latin-1')
-
-                    # Parse VTT/SRT into segments
-                    if ext == '.vtt':
-                        captions_segments = self._parse_vtt(text)
-                    else:
-                        captions_segments = self._parse_srt(text)
-                    break
+                    # Streamed cue by cue; rolling duplicates and markup are normalised away
+                    return list(parse_caption_file(str(matches[0])))
         except Exception:
-            captions_segments = None
-
-        if captions_segments:
-            result['captions'] = captions_segments
-
-        return result
+            return None
+        return None
 
-    def _parse_vtt(self, vtt_text: str):
-        """Simple WebVTT parser returning segments list with start/end/text"""
-        segments = []
-        lines = vtt_text.splitlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if '-->' in line:
-                # timestamp line
+    def _clear_subtitles(self, video_id: str):
+        """Remove subtitle files from an earlier fetch so they can't be mistaken for fresh ones"""
+        for ext in ('.vtt', '.srt'):
+            for path in self.cache_dir.glob(f"{video_id}.*{ext}"):
                 try:
-                    times = line.split('-->')
-                    start = self._vtt_time_to_seconds(times[0].strip())
-                    end = self._vtt_time_to_seconds(times[1].strip())
-                    i += 1
-                    # collect text lines
-                    texts = []
-                    while i < len(lines) and lines[i].strip() != '':
-                        texts.append(lines[i].strip())
-                        i += 1
-                    segments.append({
-                        'start': start,
-                        'end': end,
-                        'text': ' '.join(texts).strip()
-                    })
-                except Exception:
-                    i += 1
-            else:
-                i += 1
-        return segments
+                    os.remove(path)
+                except OSError:
+                    pass
 
-    def _vtt_time_to_seconds(self, t: str) -> float:
-        # formats: HH:MM:SS.mmm or MM:SS.mmm
-        parts = t.split(':')
-        parts = [p.replace(',', '.') for p in parts]
-        parts = [float(p) for p in parts]
-        if len(parts) == 3:
-            return parts[0] * 3600 + parts[1] * 60 + parts[2]
-        elif len(parts) == 2:
-            return parts[0] * 60 + parts[1]
-        return 0.0
-
-    def _parse_srt(self, srt_text: str):
-        """Simple SRT parser returning segments list with start/end/text"""
-        segments = []
-        blocks = srt_text.split('\n\n')
-        for block in blocks:
-            lines = [l.strip() for l in block.splitlines() if l.strip()]
-            if len(lines) >= 2:
-                # first line may be index, second timestamps
-                if '-->' in lines[0]:
-                    time_line = lines[0]
-                    text_lines = lines[1:]
-                else:
-                    time_line = lines[1]
-                    text_lines = lines[2:]
-                try:
-                    times = time_line.split('-->')
-                    start = self._vtt_time_to_seconds(times[0].strip())
-                    end = self._vtt_time_to_seconds(times[1].strip())
-                    segments.append({
-                        'start': start,
-                        'end': end,
-                        'text': ' '.join(text_lines).strip()
-                    })
-                except Exception:
-                    continue
-        return segments
-    
     async def extract_audio_from_file(self, video_path: str, video_id: str) -> str:
         """Extract audio from uploaded video file using ffmpeg"""
         audio_path = self.cache_dir / f"{video_id}.mp3"
@@ -0,0 +1,51 @@
+import numpy as np
+
+from services.vad import VoiceActivityDetector
+from utils.pcm_audio import SAMPLE_RATE
+
+
+def speech_like(seconds: float, rms_dbfs: float, rng: np.random.Generator) -> np.ndarray:
+    """Noise shaped by a ~4 Hz syllable envelope that never falls silent"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.35 + 0.65 * np.abs(np.sin(2 * np.pi * 2.1 * t + rng.uniform(0, np.pi)))
+    signal = rng.normal(0, 1, len(t)) * envelope
+    signal *= 32768 * 10 ** (rms_dbfs / 20) / np.sqrt(np.mean(signal ** 2))
+    return signal
+
+
+def silence(seconds: float, rng: np.random.Generator) -> np.ndarray:
+    return rng.normal(0, 3, int(seconds * SAMPLE_RATE))
+
+
+def to_pcm(*parts: np.ndarray) -> np.ndarray:
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+
+
+def test_continuous_speech_with_quiet_passages_is_kept_whole():
+    # No pauses at all: loud passages alternate with passages 14 dB quieter
+    rng = np.random.default_rng(0)
+    samples = to_pcm(*[speech_like(6, -20 if k % 2 == 0 else -34, rng) for k in range(20)])
+    duration = len(samples) / SAMPLE_RATE
+
+    regions = VoiceActivityDetector().detect(samples)
+
+    assert regions == [(0.0, duration)]
+
+
+def test_soft_speech_between_pauses_survives():
+    rng = np.random.default_rng(1)
+    parts = []
+    for k in range(12):
+        parts.append(speech_like(5, -20 if k % 2 == 0 else -34, rng))
+        parts.append(silence(3, rng))
+    samples = to_pcm(*parts)
+
+    regions = VoiceActivityDetector().detect(samples)
+
+    # Every speech passage, loud or soft, lies inside a kept region
+    for k in range(12):
+        start, end = k * 8.0, k * 8.0 + 5.0
+        assert any(lo <= start and end <= hi for lo, hi in regions), (start, end)
+    kept = sum(hi - lo for lo, hi in regions)
+    assert kept < 0.85 * len(samples) / SAMPLE_RATE
+
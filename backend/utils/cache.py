@@ -1,7 +1,9 @@
-import json
 import os
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Iterator
+
+from utils.codec import read_json, write_json, dumps, loads
+from utils.transcript_store import ColumnarTranscript, write_columnar, open_columnar, migrate_transcript
 
 
 class CacheManager:
@@ -10,41 +12,181 @@ class CacheManager:
         backend_dir = Path(__file__).parent.parent
         self.cache_dir = backend_dir / "cache"
         self.transcripts_dir = self.cache_dir / "transcripts"
+        self.partial_dir = self.transcripts_dir / "partial"
         self.metadata_dir = self.cache_dir / "metadata"
         self.audio_dir = self.cache_dir / "audio"
         
         # Create directories
         self.transcripts_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_dir.mkdir(parents=True, exist_ok=True)
         self.audio_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._transcript_listeners: List[Callable[[str, Optional[List[Dict]], Optional[str]], None]] = []
+        self._partial_listeners: List[Callable[[str, Dict], None]] = []
+    
+    def _transcript_path(self, video_id: str) -> Path:
+        return self.transcripts_dir / f"{video_id}.seg"
+    
+    def _legacy_transcript_path(self, video_id: str) -> Path:
+        return self.transcripts_dir / f"{video_id}.json"
+    
+    def open_transcript(self, video_id: str) -> Optional[ColumnarTranscript]:
+        """Open a cached transcript as a memory-mapped columnar view.
+        
+        Segments are only decoded when accessed, so searches and slices don't
+        pay for the whole transcript. Legacy JSON transcripts are converted
+        on first access.
+        """
+        transcript_path = self._transcript_path(video_id)
+        if not transcript_path.exists():
+            legacy_path = self._legacy_transcript_path(video_id)
+            if not legacy_path.exists():
+                return None
+            migrate_transcript(legacy_path)
+        return open_columnar(transcript_path)
     
     def get_transcript(self, video_id: str) -> Optional[List[Dict]]:
-        """Get cached transcript"""
-        transcript_path = self.transcripts_dir / f"{video_id}.json"
-        if transcript_path.exists():
-            with open(transcript_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return None
+        """Get cached transcript as a list of segment dicts (the API's JSON export)"""
+        transcript = self.open_transcript(video_id)
+        if transcript is None:
+            return None
+        try:
+            return transcript.to_list()
+        finally:
+            transcript.close()
+    
+    def list_transcripts(self) -> Iterator[str]:
+        """Yield the video_id of every cached transcript"""
+        seen = set()
+        for path in sorted(self.transcripts_dir.iterdir()):
+            if path.suffix == ".seg" or (path.suffix == ".json" and not path.name.endswith(".index.json")):
+                if path.stem not in seen:
+                    seen.add(path.stem)
+                    yield path.stem
+    
+    def add_transcript_listener(self, callback: Callable[[str, Optional[List[Dict]], Optional[str]], None]):
+        """Register a callback receiving (video_id, transcript, etag) on save and (video_id, None, None) on delete"""
+        self._transcript_listeners.append(callback)
+    
+    def _notify_transcript(self, video_id: str, transcript: Optional[List[Dict]]):
+        etag = self.transcript_etag(video_id) if transcript is not None else None
+        for callback in self._transcript_listeners:
+            try:
+                callback(video_id, transcript, etag)
+            except Exception as e:
+                print(f"Transcript listener failed for {video_id}: {str(e)}")
+    
+    def has_transcript(self, video_id: str) -> bool:
+        """Check for a cached transcript without loading it"""
+        return self._transcript_path(video_id).exists() or self._legacy_transcript_path(video_id).exists()
+    
+    def transcript_etag(self, video_id: str) -> Optional[str]:
+        """Strong ETag for the cached transcript, derived from its file's mtime and size"""
+        transcript_path = self._transcript_path(video_id)
+        try:
+            stat = transcript_path.stat()
+        except FileNotFoundError:
+            return None
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
     
     def save_transcript(self, video_id: str, transcript: List[Dict]):
         """Save transcript to cache"""
-        transcript_path = self.transcripts_dir / f"{video_id}.json"
-        with open(transcript_path, "w", encoding="utf-8") as f:
-            json.dump(transcript, f, indent=2, ensure_ascii=False)
+        write_columnar(self._transcript_path(video_id), transcript)
+        
+        # Any legacy copy or index built for the previous transcript is now stale
+        for stale_path in (self._legacy_transcript_path(video_id), self.transcripts_dir / f"{video_id}.index.json"):
+            if stale_path.exists():
+                os.remove(stale_path)
+        
+        # The complete transcript supersedes any partial one
+        self.delete_partial(video_id)
+        self._notify_transcript(video_id, transcript)
+    
+    def delete_transcript(self, video_id: str):
+        """Remove a cached transcript and its search index"""
+        for suffix in (".seg", ".json", ".index.json"):
+            path = self.transcripts_dir / f"{video_id}{suffix}"
+            if path.exists():
+                os.remove(path)
+        self.delete_partial(video_id)
+        
+        self._notify_transcript(video_id, None)
+    
+    def _partial_path(self, video_id: str) -> Path:
+        return self.partial_dir / f"{video_id}.ndjson"
+    
+    def add_partial_listener(self, callback: Callable[[str, Dict], None]):
+        """Register a callback receiving (video_id, chunk record) for every saved partial chunk"""
+        self._partial_listeners.append(callback)
+    
+    def save_partial_chunk(self, video_id: str, chunk: Dict, segments: List[Dict], total_chunks: int):
+        """Append one transcribed chunk to a video's partial transcript (while transcription runs).
+        
+        Records are one JSON line each, so a crash mid-write loses at most
+        the line being written. Each names its run (the transcription's
+        cache key), since earlier or other-backend runs may have left theirs.
+        """
+        record = {
+            "run": chunk.get("run"),
+            "chunk": chunk["index"],
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "total_chunks": total_chunks,
+            "segments": segments
+        }
+        with open(self._partial_path(video_id), "ab") as f:
+            f.write(dumps(record) + b"\n")
+        for callback in self._partial_listeners:
+            try:
+                callback(video_id, record)
+            except Exception as e:
+                print(f"Partial transcript listener failed for {video_id}: {str(e)}")
+    
+    def get_partial_chunks(self, video_id: str, run: Optional[str]) -> List[Dict]:
+        """Chunk records of one run's partial transcript in timeline order (latest record per chunk)"""
+        path = self._partial_path(video_id)
+        if not path.exists():
+            return []
+        chunks = {}
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                except ValueError:
+                    continue  # a torn last line
+                if record.get("run") == run:
+                    chunks[record["chunk"]] = record
+        return sorted(chunks.values(), key=lambda record: record["start"])
+    
+    def delete_partial(self, video_id: str):
+        path = self._partial_path(video_id)
+        if path.exists():
+            os.remove(path)
+    
+    def get_index(self, video_id: str) -> Optional[Dict]:
+        """Get the cached search index stored next to a transcript"""
+        index_path = self.transcripts_dir / f"{video_id}.index.json"
+        if index_path.exists():
+            return read_json(index_path)
+        return None
+    
+    def save_index(self, video_id: str, index: Dict):
+        """Save a transcript's search index next to the transcript"""
+        index_path = self.transcripts_dir / f"{video_id}.index.json"
+        write_json(index_path, index)
     
     def get_metadata(self, cache_key: str) -> Optional[Dict]:
         """Get cached metadata"""
         metadata_path = self.metadata_dir / f"{cache_key}.json"
         if metadata_path.exists():
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return read_json(metadata_path)
         return None
     
     def save_metadata(self, cache_key: str, metadata: Dict):
         """Save metadata to cache"""
         metadata_path = self.metadata_dir / f"{cache_key}.json"
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        write_json(metadata_path, metadata)
     
     def get_audio_path(self, video_id: str) -> Optional[str]:
         """Get audio file path"""
@@ -0,0 +1,93 @@
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, List, Dict
+
+from utils.codec import read_json, write_json
+
+
+class CheckpointStore:
+    """Per-chunk results of chunked transcriptions, so a rerun only redoes what's missing.
+
+    A checkpoint is keyed like the transcript cache ({audio sha256}_{params
+    hash}). Its manifest holds the chunk plan and the chunks that failed on
+    the last run; every finished chunk is saved on its own, named by its
+    boundaries, so a different plan never picks up the wrong chunk.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        if cache_dir is None:
+            backend_dir = Path(__file__).parent.parent
+            cache_dir = backend_dir / "cache" / "checkpoints"
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.restored_chunks = 0
+        self.saved_chunks = 0
+
+    def _dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def _chunk_path(self, key: str, chunk: Dict) -> Path:
+        return self._dir(key) / (f"{chunk['index']:04d}_{round(chunk['keep_start'] * 1000)}"
+                                 f"_{round(chunk['keep_end'] * 1000)}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The manifest of a checkpoint, or None"""
+        try:
+            return read_json(self._dir(key) / "manifest.json")
+        except (OSError, ValueError):
+            return None
+
+    def start(self, key: str, chunks: List[Dict]) -> Dict[int, List[Dict]]:
+        """Record a run's chunk plan and return the segments of chunks already done, by index"""
+        manifest = self.get(key) or {"created_at": time.time(), "failed": []}
+        plan = [{k: chunk[k] for k in ("index", "start", "end", "keep_start", "keep_end")} for chunk in chunks]
+        if manifest.get("chunks") != plan:
+            manifest.update(chunks=plan, failed=[])
+        manifest["updated_at"] = time.time()
+        self._dir(key).mkdir(parents=True, exist_ok=True)
+        write_json(self._dir(key) / "manifest.json", manifest)
+
+        done = {}
+        for chunk in chunks:
+            try:
+                done[chunk["index"]] = read_json(self._chunk_path(key, chunk))
+            except (OSError, ValueError):
+                continue
+        self.restored_chunks += len(done)
+        return done
+
+    def save_chunk(self, key: str, chunk: Dict, segments: List[Dict]):
+        """Persist one finished chunk's segments"""
+        chunk_dir = self._dir(key)
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        write_json(self._chunk_path(key, chunk), segments)
+        self.saved_chunks += 1
+
+    def record_failures(self, key: str, failed: List[Dict]):
+        """Store the chunks that failed every retry on this run"""
+        manifest = self.get(key)
+        if manifest is None:
+            return
+        manifest.update(failed=failed, updated_at=time.time())
+        write_json(self._dir(key) / "manifest.json", manifest)
+
+    def delete(self, key: str) -> bool:
+        """Drop a checkpoint (once its transcript is complete and cached)"""
+        if not self._dir(key).exists():
+            return False
+        shutil.rmtree(self._dir(key), ignore_errors=True)
+        return True
+
+    def delete_audio(self, audio_hash: str) -> int:
+        """Drop every checkpoint of an audio file, regardless of parameters"""
+        return sum(1 for path in self.cache_dir.glob(f"{audio_hash}_*") if self.delete(path.name))
+
+    def stats(self) -> Dict:
+        checkpoints = [path for path in self.cache_dir.iterdir() if path.is_dir()]
+        return {
+            "checkpoints": len(checkpoints),
+            "with_failures": sum(1 for path in checkpoints if (self.get(path.name) or {}).get("failed")),
+            "restored_chunks": self.restored_chunks,
+            "saved_chunks": self.saved_chunks,
+        }
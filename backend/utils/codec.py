@@ -0,0 +1,29 @@
+import os
+from pathlib import Path
+from typing import Any, Union
+
+import orjson
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to compact UTF-8 JSON"""
+    return orjson.dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return orjson.loads(data)
+
+
+def read_json(path: Union[str, Path]) -> Any:
+    """Read and decode a JSON file in one go"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def write_json(path: Union[str, Path], obj: Any):
+    """Encode obj and write it atomically, so readers never see a partial file"""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(obj))
+    os.replace(tmp_path, path)
@@ -0,0 +1,170 @@
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Sequence
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+
+def to_fts_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: quoted parts are phrases, every term is required"""
+    parts = []
+    for phrase in PHRASE_PATTERN.findall(query):
+        tokens = TOKEN_PATTERN.findall(phrase)
+        if tokens:
+            parts.append('"' + " ".join(tokens) + '"')
+    for token in TOKEN_PATTERN.findall(PHRASE_PATTERN.sub(" ", query)):
+        parts.append(f'"{token}"')
+    return " AND ".join(parts) if parts else None
+
+
+class CorpusIndex:
+    """Full-text index over every cached transcript (SQLite FTS5, BM25 ranking).
+
+    Each segment is a row of the FTS table. A video's rows occupy one
+    contiguous rowid range, so replacing or removing a transcript is a range
+    delete rather than a scan, and indexing stays incremental as the corpus
+    grows.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        if db_path is None:
+            backend_dir = Path(__file__).parent.parent
+            db_path = backend_dir / "cache" / "corpus.db"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+                    text,
+                    video_id UNINDEXED,
+                    segment_idx UNINDEXED,
+                    start UNINDEXED,
+                    end UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    version TEXT,
+                    first_rowid INTEGER NOT NULL,
+                    last_rowid INTEGER NOT NULL,
+                    segment_count INTEGER NOT NULL,
+                    indexed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS videos_last_rowid ON videos (last_rowid)")
+
+    def version(self, video_id: str) -> Optional[str]:
+        """Version tag the video was indexed with, or None if it is not indexed"""
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return row["version"] if row else None
+
+    def video_ids(self) -> List[str]:
+        """Get every indexed video_id"""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id FROM videos").fetchall()
+        return [row["video_id"] for row in rows]
+
+    def add_transcript(self, video_id: str, transcript: Sequence[Dict], version: Optional[str] = None):
+        """Index (or re-index) a video's transcript"""
+        with self._lock, self._conn:
+            self._delete(video_id)
+            row = self._conn.execute("SELECT COALESCE(MAX(last_rowid), 0) AS last FROM videos").fetchone()
+            first_rowid = row["last"] + 1
+            self._conn.executemany(
+                "INSERT INTO segments (rowid, text, video_id, segment_idx, start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (first_rowid + segment_idx, segment["text"], video_id, segment_idx, segment["start"], segment["end"])
+                    for segment_idx, segment in enumerate(transcript)
+                )
+            )
+            self._conn.execute(
+                "INSERT INTO videos (video_id, version, first_rowid, last_rowid, segment_count, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, version, first_rowid, first_rowid + len(transcript) - 1, len(transcript), time.time())
+            )
+
+    def remove_transcript(self, video_id: str):
+        """Drop a video from the index"""
+        with self._lock, self._conn:
+            self._delete(video_id)
+
+    def _delete(self, video_id: str):
+        row = self._conn.execute(
+            "SELECT first_rowid, last_rowid FROM videos WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        if row is None:
+            return
+        self._conn.execute(
+            "DELETE FROM segments WHERE rowid BETWEEN ? AND ?", (row["first_rowid"], row["last_rowid"])
+        )
+        self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    def on_transcript_changed(self, video_id: str, transcript: Optional[Sequence[Dict]], version: Optional[str] = None):
+        """CacheManager listener: index saved transcripts, forget deleted ones"""
+        if transcript is None:
+            self.remove_transcript(video_id)
+        else:
+            self.add_transcript(video_id, transcript, version)
+
+    def search(self, query: str, top_k: int = 10, hits_per_video: int = 5, max_segments: int = 1000) -> Dict:
+        """Rank videos for a query and return their best-matching segments.
+
+        The best max_segments segments by BM25 are fetched (FTS5 keeps only a
+        top-N heap for ORDER BY rank LIMIT), then grouped per video; a video's
+        score is the sum of its segment scores.
+        """
+        fts_query = to_fts_query(query)
+        if fts_query is None:
+            return {"results": [], "segments_considered": 0}
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id, segment_idx, start, end, text, -bm25(segments) AS score "
+                "FROM segments WHERE segments MATCH ? ORDER BY rank LIMIT ?",
+                (fts_query, max_segments)
+            ).fetchall()
+
+        videos: Dict[str, Dict] = {}
+        for row in rows:
+            video = videos.setdefault(row["video_id"], {"video_id": row["video_id"], "score": 0.0, "hits": []})
+            video["score"] += row["score"]
+            video["hits"].append({
+                "segment_idx": row["segment_idx"],
+                "start": row["start"],
+                "end": row["end"],
+                "text": row["text"],
+                "score": round(row["score"], 4)
+            })
+
+        ranked = sorted(videos.values(), key=lambda video: video["score"], reverse=True)[:top_k]
+        for video in ranked:
+            video["score"] = round(video["score"], 4)
+            video["match_count"] = len(video["hits"])
+            # Best hits first, then shown in timeline order
+            video["hits"] = sorted(video["hits"][:hits_per_video], key=lambda hit: hit["start"])
+        return {"results": ranked, "segments_considered": len(rows)}
+
+    def stats(self) -> Dict:
+        """Get index size counters"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS videos, COALESCE(SUM(segment_count), 0) AS segments FROM videos"
+            ).fetchone()
+        return {"videos": row["videos"], "segments": row["segments"]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
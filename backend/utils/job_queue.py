@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, List, Dict, Callable, Awaitable
+
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class Job:
+    """Handle passed to job handlers for reporting progress"""
+    
+    def __init__(self, queue: "JobQueue", job_id: str, kind: str, payload: Dict):
+        self.queue = queue
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+    
+    async def set_stage(self, stage: str, progress: Optional[float] = None, **detail):
+        """Record the stage the job is in and notify subscribers"""
+        self.queue._update(self.id, stage=stage, progress=progress, detail=detail or None)
+
+
+class JobQueue:
+    """Persistent background job queue.
+    
+    Jobs are stored in SQLite so they survive restarts: anything still queued
+    or running when the process stopped is queued again on start. A pool of
+    asyncio workers runs the handler registered for each job kind; stage
+    updates are pushed to subscribers (used for server-sent events).
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None, num_workers: Optional[int] = None):
+        if db_path is None:
+            backend_dir = Path(__file__).parent.parent
+            db_path = backend_dir / "cache" / "jobs.db"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        if num_workers is None:
+            num_workers = int(os.getenv("JOB_WORKERS", "2"))
+        self.num_workers = max(1, num_workers)
+        
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL,
+                    detail TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+        
+        self._handlers: Dict[str, Callable[[Job], Awaitable[Dict]]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+    
+    def register_handler(self, kind: str, handler: Callable[[Job], Awaitable[Dict]]):
+        """Register the coroutine that runs jobs of a kind; its return value is the job result"""
+        self._handlers[kind] = handler
+    
+    async def start(self):
+        """Start the workers and re-queue jobs left unfinished by a previous run"""
+        self._queue = asyncio.Queue()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        for row in rows:
+            self._update(row["id"], status="queued")
+            self._queue.put_nowait(row["id"])
+        if rows:
+            print(f"Resuming {len(rows)} unfinished jobs")
+        
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+    
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    def submit(self, kind: str, payload: Dict) -> str:
+        """Queue a job and return its id immediately"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, progress, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', 0.0, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now)
+            )
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+        return job_id
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get the current state of a job"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "payload": json.loads(row["payload"]),
+            "status": row["status"],
+            "stage": row["stage"],
+            "progress": row["progress"],
+            "detail": json.loads(row["detail"]) if row["detail"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+    
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Get a queue that receives the job's state after every update"""
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        return queue
+    
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(job_id, None)
+    
+    def _update(self, job_id: str, **fields):
+        fields = {key: value for key, value in fields.items() if value is not None}
+        for key in ("detail", "result"):
+            if key in fields:
+                fields[key] = json.dumps(fields[key], default=str)
+        fields["updated_at"] = time.time()
+        
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+        
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            state = self.get(job_id)
+            for queue in subscribers:
+                queue.put_nowait(state)
+    
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job_id: str):
+        state = self.get(job_id)
+        if state is None or state["status"] in TERMINAL_STATUSES:
+            return
+        
+        handler = self._handlers.get(state["kind"])
+        if handler is None:
+            self._update(job_id, status="failed", error=f"Unknown job kind: {state['kind']}")
+            return
+        
+        self._update(job_id, status="running")
+        try:
+            result = await handler(Job(self, job_id, state["kind"], state["payload"]))
+            self._update(job_id, status="completed", stage="done", progress=1.0, result=result or {})
+        except asyncio.CancelledError:
+            # Shutting down: leave the job as running so the next start resumes it
+            raise
+        except Exception as e:
+            import traceback
+            print(f"Job {job_id} failed: {traceback.format_exc()}")
+            self._update(job_id, status="failed", error=str(e))
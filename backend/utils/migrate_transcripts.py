@@ -0,0 +1,64 @@
+"""Convert cached JSON transcripts (cache/transcripts/*.json) to the columnar .seg format.
+
+Usage (from the backend directory):
+    python -m utils.migrate_transcripts [--keep-json] [--dry-run]
+"""
+import argparse
+from pathlib import Path
+
+from utils.codec import read_json
+from utils.transcript_store import ColumnarTranscript, migrate_transcript
+
+
+def find_legacy_transcripts(transcripts_dir: Path):
+    """Yield legacy transcript JSON files, skipping search indexes"""
+    for json_path in sorted(transcripts_dir.glob("*.json")):
+        if not json_path.name.endswith(".index.json"):
+            yield json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transcripts-dir", type=Path,
+                        default=Path(__file__).parent.parent / "cache" / "transcripts")
+    parser.add_argument("--keep-json", action="store_true", help="keep the original JSON files")
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be converted")
+    args = parser.parse_args()
+
+    converted = 0
+    failed = 0
+    bytes_before = 0
+    bytes_after = 0
+    for json_path in find_legacy_transcripts(args.transcripts_dir):
+        if args.dry_run:
+            print(f"Would convert {json_path.name}")
+            continue
+        try:
+            expected = len(read_json(json_path))
+            size = json_path.stat().st_size
+            seg_path = migrate_transcript(json_path, keep_json=True)
+
+            # Verify before the JSON copy goes away
+            transcript = ColumnarTranscript(seg_path)
+            count = len(transcript)
+            transcript.close()
+            if count != expected:
+                raise ValueError(f"segment count mismatch ({count} != {expected})")
+            if not args.keep_json:
+                json_path.unlink()
+
+            bytes_before += size
+            bytes_after += seg_path.stat().st_size
+            converted += 1
+            print(f"Converted {json_path.name}: {expected} segments")
+        except Exception as e:
+            failed += 1
+            print(f"Failed to convert {json_path.name}: {str(e)}")
+
+    if not args.dry_run:
+        print(f"Converted {converted} transcripts ({failed} failed), "
+              f"{bytes_before / 1024 / 1024:.1f}MB -> {bytes_after / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
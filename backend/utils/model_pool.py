@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Callable, Any
+
+
+def current_rss() -> Optional[int]:
+    """Resident memory of this process in bytes (Linux /proc; None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class PooledModel:
+    """One pool slot: the loaded instance plus its load/usage bookkeeping"""
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.instance: Any = None
+        self.state = "unloaded"  # unloaded, loading, idle, busy
+        self.load_seconds: Optional[float] = None
+        self.memory_bytes: Optional[int] = None
+        self.uses = 0
+        self.last_used = 0.0
+
+    def stats(self) -> Dict:
+        return {
+            "slot": self.slot,
+            "state": self.state,
+            "load_seconds": None if self.load_seconds is None else round(self.load_seconds, 3),
+            "memory_bytes": self.memory_bytes,
+            "uses": self.uses,
+            "idle_seconds": round(time.time() - self.last_used, 1) if self.state == "idle" else None
+        }
+
+
+class ModelPool:
+    """Fixed-size pool of model instances handed out one caller at a time.
+
+    Up to `size` instances are created with `factory` and loaded on first
+    demand (or up front with preload()); `warm` of them stay loaded for
+    good, the rest are unloaded after `idle_seconds` without use. Loads are
+    serialised so each instance's memory footprint can be measured as the
+    growth in process RSS. Thread-based, since inference runs in executor
+    threads.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 1, warm: int = 1,
+                 idle_seconds: float = 300.0, name: str = "model"):
+        self.factory = factory
+        self.size = max(1, size)
+        self.warm = max(0, min(warm, self.size))
+        self.idle_seconds = idle_seconds
+        self.name = name
+        self._slots = [PooledModel(slot) for slot in range(self.size)]
+        self._condition = threading.Condition()
+        self._load_lock = threading.Lock()
+        self.waits = 0
+        self.cold_starts = 0
+
+    @property
+    def ready(self) -> bool:
+        """True once the warm instances are loaded (always true with warm=0)"""
+        with self._condition:
+            loaded = sum(1 for slot in self._slots if slot.state in ("idle", "busy"))
+        return loaded >= self.warm
+
+    def preload(self, count: Optional[int] = None):
+        """Load `count` instances (default: the warm count) before any traffic arrives"""
+        count = self.warm if count is None else min(count, self.size)
+        for _ in range(count):
+            with self._condition:
+                slot = next((slot for slot in self._slots if slot.state == "unloaded"), None)
+                if slot is None:
+                    return
+                slot.state = "loading"
+            self._load(slot, release=True)
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a loaded instance, loading one or waiting for a free one as needed"""
+        slot = self._checkout()
+        if slot.instance is None:
+            self.cold_starts += 1
+            self._load(slot, release=False)
+        try:
+            yield slot.instance
+        finally:
+            with self._condition:
+                slot.state = "idle"
+                slot.uses += 1
+                slot.last_used = time.time()
+                self._condition.notify()
+
+    def _checkout(self) -> PooledModel:
+        with self._condition:
+            waited = False
+            while True:
+                # Prefer an idle loaded instance, then an empty slot to load into
+                slot = next((slot for slot in self._slots if slot.state == "idle"), None)
+                if slot is None:
+                    slot = next((slot for slot in self._slots if slot.state == "unloaded"), None)
+                if slot is not None:
+                    slot.state = "busy" if slot.instance is not None else "loading"
+                    return slot
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self._condition.wait()
+
+    def _load(self, slot: PooledModel, release: bool):
+        try:
+            with self._load_lock:
+                rss_before = current_rss()
+                started = time.perf_counter()
+                instance = self.factory()
+                instance.load()
+                slot.load_seconds = time.perf_counter() - started
+                rss_after = current_rss()
+            slot.memory_bytes = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            print(f"Loaded {self.name} instance {slot.slot} in {slot.load_seconds:.1f}s")
+        except Exception:
+            with self._condition:
+                slot.state = "unloaded"
+                self._condition.notify()
+            raise
+        with self._condition:
+            slot.instance = instance
+            slot.state = "idle" if release else "busy"
+            slot.last_used = time.time()
+            if release:
+                self._condition.notify()
+
+    def trim(self) -> int:
+        """Unload instances beyond the warm count that have been idle too long; returns how many"""
+        now = time.time()
+        unloaded = []
+        with self._condition:
+            loaded = sum(1 for slot in self._slots if slot.instance is not None)
+            for slot in sorted(self._slots, key=lambda slot: slot.last_used):
+                if loaded <= self.warm:
+                    break
+                if slot.state == "idle" and now - slot.last_used >= self.idle_seconds:
+                    unloaded.append(slot.instance)
+                    slot.instance = None
+                    slot.state = "unloaded"
+                    loaded -= 1
+        for instance in unloaded:
+            unload = getattr(instance, "unload", None)
+            if unload:
+                unload()
+        return len(unloaded)
+
+    def stats(self) -> Dict:
+        """Per-instance state, load time and memory, plus pool counters"""
+        with self._condition:
+            instances = [slot.stats() for slot in self._slots]
+        return {
+            "size": self.size,
+            "warm": self.warm,
+            "ready": self.ready,
+            "cold_starts": self.cold_starts,
+            "waits": self.waits,
+            "instances": instances
+        }
@@ -0,0 +1,234 @@
+import os
+import struct
+import subprocess
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Optional, Callable, Dict, List
+
+import numpy as np
+
+
+# Canonical intermediate audio: 16 kHz, mono, 16-bit little-endian PCM in a WAV file
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+def _data_chunk(path: str) -> Optional[tuple]:
+    """(offset, size) of the sample data if path is a canonical 16 kHz mono s16 WAV, else None"""
+    try:
+        with open(path, "rb") as f:
+            riff = f.read(12)
+            if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+                return None
+            canonical = False
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size)
+                    audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+                    canonical = audio_format == 1 and channels == 1 and rate == SAMPLE_RATE and bits == 16
+                elif chunk_id == b"data":
+                    if not canonical:
+                        return None
+                    offset = f.tell()
+                    # Streamed WAVs may leave the size unset; trust the file length instead
+                    size = min(chunk_size, os.path.getsize(path) - offset)
+                    return offset, size - size % SAMPLE_WIDTH
+                else:
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+
+
+def is_canonical_wav(path: str) -> bool:
+    """Whether a file already is 16 kHz mono 16-bit PCM WAV"""
+    return _data_chunk(path) is not None
+
+
+def write_wav(path: str, samples: np.ndarray):
+    """Write int16 mono samples as a canonical WAV file"""
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(SAMPLE_WIDTH)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes(samples.astype("<i2", copy=False).tobytes())
+
+
+class PCMAudio:
+    """A canonical WAV file memory-mapped as int16 samples.
+
+    Slices are views into the mapping: nothing is decoded or copied until a
+    stage actually touches the samples.
+    """
+
+    def __init__(self, path: str):
+        data = _data_chunk(path)
+        if data is None:
+            raise ValueError(f"Not a 16 kHz mono PCM WAV file: {path}")
+        offset, size = data
+        self.path = str(path)
+        count = size // SAMPLE_WIDTH
+        if count:
+            self.samples = np.memmap(self.path, dtype="<i2", mode="r", offset=offset, shape=(count,))
+        else:
+            self.samples = np.zeros(0, dtype="<i2")
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+    def slice(self, start: float, end: float) -> np.ndarray:
+        """Samples between two times in seconds (a view, not a copy)"""
+        return self.samples[max(0, int(start * SAMPLE_RATE)):max(0, int(end * SAMPLE_RATE))]
+
+    def write_slice(self, path: str, start: float, end: float) -> str:
+        """Write [start, end) as its own WAV file; no decoding or encoding involved"""
+        write_wav(path, self.slice(start, end))
+        return str(path)
+
+    def float_samples(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        """float32 samples in [-1, 1], the input format of Whisper models"""
+        piece = self.slice(start, self.duration if end is None else end)
+        return piece.astype(np.float32) / 32768.0
+
+    def peaks(self, points: int) -> List[float]:
+        """Peak level (0..1) of `points` equal buckets, for drawing a waveform"""
+        points = max(1, points)
+        count = len(self.samples)
+        if count == 0:
+            return [0.0] * points
+        bounds = np.linspace(0, count, points + 1).astype(np.int64)
+        levels = []
+        # Bucket by bucket, so only one bucket of the mapping is paged in at a time
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            piece = self.samples[lo:hi]
+            levels.append(max(int(piece.max()), -int(piece.min())) if hi > lo else 0)
+        return [round(min(level / 32768.0, 1.0), 4) for level in levels]
+
+
+class PCMStore:
+    """Decodes each recording once to canonical PCM and hands out memory maps of it.
+
+    Files are content-addressed (cache/pcm/{sha256}.wav), so every stage and
+    every video_id that sees the same audio bytes shares one decode. Inputs
+    that already are canonical WAVs are used in place. Decodes are about 4x
+    the size of a typical MP3, so the store is capped at max_bytes and the
+    least recently used files go first.
+    """
+
+    def __init__(self, ffmpeg_path: Optional[str], audio_hash: Callable[[str], str],
+                 cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        if cache_dir is None:
+            backend_dir = Path(__file__).parent.parent
+            cache_dir = backend_dir / "cache" / "pcm"
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg_path = ffmpeg_path
+        self.audio_hash = audio_hash
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("PCM_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+        self.max_bytes = max(0, max_bytes)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.decodes = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def path_for(self, audio_path: str) -> Path:
+        return self.cache_dir / f"{self.audio_hash(audio_path)}.wav"
+
+    def ensure(self, audio_path: str) -> str:
+        """Path of the canonical PCM for a file, decoding it on first use (blocking)"""
+        if is_canonical_wav(audio_path):
+            return audio_path
+
+        pcm_path = self.path_for(audio_path)
+        with self._lock:
+            lock = self._locks.setdefault(str(pcm_path), threading.Lock())
+        # Concurrent callers for the same audio wait for one decode
+        with lock:
+            if pcm_path.exists():
+                self.hits += 1
+                try:
+                    os.utime(pcm_path)  # mark as recently used
+                except OSError:
+                    pass
+                return str(pcm_path)
+            if not self.ffmpeg_path:
+                raise RuntimeError("ffmpeg not found. Cannot decode audio file.")
+            temp_path = pcm_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            cmd = [
+                self.ffmpeg_path,
+                '-nostats',
+                '-loglevel', 'error',
+                '-i', audio_path,
+                '-vn',
+                '-map_metadata', '-1',
+                '-ac', '1',
+                '-ar', str(SAMPLE_RATE),
+                '-c:a', 'pcm_s16le',
+                '-f', 'wav',
+                '-y',
+                str(temp_path)
+            ]
+            try:
+                subprocess.run(cmd, capture_output=True, check=True, timeout=1800)
+                os.replace(temp_path, pcm_path)
+            finally:
+                if temp_path.exists():
+                    os.remove(temp_path)
+            self.decodes += 1
+        self._evict(keep=pcm_path)
+        return str(pcm_path)
+
+    def _evict(self, keep: Path):
+        """Delete least recently used decodes until the store fits in max_bytes"""
+        files = []
+        for path in self.cache_dir.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        # Files used in the last minute may have just been handed to a stage that hasn't opened them yet
+        recent = time.time() - 60
+        for mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep or mtime > recent:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # still mapped (Windows); try again after the next decode
+            total -= size
+            self.evictions += 1
+
+    def delete(self, audio_hash: str) -> bool:
+        """Drop the decode of the audio with this content hash, if there is one"""
+        try:
+            os.remove(self.cache_dir / f"{audio_hash}.wav")
+            return True
+        except OSError:
+            return False
+
+    def open(self, audio_path: str) -> PCMAudio:
+        """Memory-map the canonical PCM of a file (decoding it first if needed)"""
+        return PCMAudio(self.ensure(audio_path))
+
+    def stats(self) -> Dict:
+        files = list(self.cache_dir.glob("*.wav"))
+        return {
+            "decodes": self.decodes,
+            "hits": self.hits,
+            "evictions": self.evictions,
+            "files": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Dict, Tuple, Callable, Awaitable, Any
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and share its result (or exception).
+    The task is shielded, so a caller that disconnects does not cancel the
+    work for everybody else.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._by_operation: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, key: Tuple, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the run already in progress"""
+        operation = str(key[0])
+        counters = self._by_operation.setdefault(operation, {"calls": 0, "executions": 0, "coalesced": 0})
+        self.calls += 1
+        counters["calls"] += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            counters["coalesced"] += 1
+        else:
+            self.executions += 1
+            counters["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Tuple, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Get coalescing counters"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "by_operation": {operation: dict(counters) for operation, counters in self._by_operation.items()},
+        }
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, List, Dict, Callable, Tuple
+
+from utils.codec import read_json, write_json
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file's contents without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Content-addressed transcript cache.
+
+    Entries are keyed by a hash of the audio bytes plus the transcription
+    parameters, so the same recording is never transcribed twice no matter
+    which video_id or path it arrives under. Hot entries live in an in-memory
+    LRU; everything is also persisted to disk.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_entries: Optional[int] = None):
+        if cache_dir is None:
+            backend_dir = Path(__file__).parent.parent
+            cache_dir = backend_dir / "cache" / "transcripts" / "by_hash"
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if max_entries is None:
+            max_entries = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "32"))
+        self.max_entries = max(0, max_entries)
+
+        self._memory: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        # (path, size, mtime_ns) -> sha256, so repeat lookups skip rehashing
+        self._audio_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._listeners: List[Callable[[str, Optional[str]], None]] = []
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def audio_hash(self, audio_path: str) -> str:
+        """Get the content hash of an audio file (memoized by size and mtime)"""
+        stat = os.stat(audio_path)
+        stat_key = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+        cached = self._audio_hashes.get(stat_key)
+        if cached:
+            return cached
+        digest = file_sha256(audio_path)
+        self._audio_hashes[stat_key] = digest
+        return digest
+
+    def make_key(self, audio_path: str, params: Optional[Dict] = None) -> str:
+        """Build a cache key from the audio content and transcription parameters"""
+        params_blob = json.dumps(params or {}, sort_keys=True, default=str)
+        params_hash = hashlib.sha256(params_blob.encode("utf-8")).hexdigest()[:16]
+        return f"{self.audio_hash(audio_path)}_{params_hash}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Get a transcript from memory, falling back to disk"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        entry_path = self._entry_path(key)
+        if entry_path.exists():
+            try:
+                transcript = read_json(entry_path)
+            except (OSError, ValueError):
+                transcript = None
+            if transcript is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, transcript)
+                return transcript
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, transcript: List[Dict]):
+        """Store a transcript in memory and on disk"""
+        write_json(self._entry_path(key), transcript)
+
+        with self._lock:
+            self._remember(key, transcript)
+
+    def _remember(self, key: str, transcript: List[Dict]):
+        # Caller holds the lock
+        if self.max_entries == 0:
+            return
+        self._memory[key] = transcript
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """Drop a single entry from memory and disk"""
+        with self._lock:
+            removed = self._memory.pop(key, None) is not None
+        entry_path = self._entry_path(key)
+        if entry_path.exists():
+            try:
+                os.remove(entry_path)
+                removed = True
+            except OSError:
+                pass
+        if removed:
+            self.invalidations += 1
+            self._notify(key.split("_", 1)[0], key)
+        return removed
+
+    def invalidate_audio(self, audio_path: str) -> int:
+        """Drop every entry for an audio file, regardless of parameters.
+
+        Listeners hear about each dropped key, then about the audio as a
+        whole (key None), since what they derived from it (checkpoints of
+        unfinished runs, decodes) may exist without any cached entry. The
+        file is rehashed on next use.
+        """
+        audio_hash = self.audio_hash(audio_path)
+        prefix = f"{audio_hash}_"
+        with self._lock:
+            keys = {key for key in self._memory if key.startswith(prefix)}
+        keys.update(p.stem for p in self.cache_dir.glob(f"{prefix}*.json"))
+        removed = sum(1 for key in keys if self.invalidate(key))
+
+        path = os.path.abspath(audio_path)
+        for stat_key in [stat_key for stat_key in self._audio_hashes if stat_key[0] == path]:
+            self._audio_hashes.pop(stat_key, None)
+        self._notify(audio_hash, None)
+        return removed
+
+    def add_invalidation_listener(self, callback: Callable[[str, Optional[str]], None]):
+        """Register a callback receiving (audio_hash, key) for each invalidated entry,
+        and (audio_hash, None) when all of an audio file's entries are dropped"""
+        self._listeners.append(callback)
+
+    def _notify(self, audio_hash: str, key: Optional[str]):
+        for callback in self._listeners:
+            try:
+                callback(audio_hash, key)
+            except Exception as e:
+                print(f"Transcript cache invalidation listener failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+        }
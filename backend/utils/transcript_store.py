@@ -0,0 +1,227 @@
+import bisect
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Optional, List, Dict, Sequence, Tuple, Union
+
+from utils.codec import read_json
+
+
+# Columnar transcript file (.seg):
+#   header   magic, version, flags, segment count, text blob length, word count
+#   starts   float32[count]
+#   ends     float32[count]
+#   offsets  uint32[count + 1]   byte offsets of each segment's text in the blob
+#   text     UTF-8 blob
+# Version 2 adds optional word timings (only when word count > 0), after
+# padding the blob to a 4-byte boundary:
+#   word_index       uint32[count + 1]   each segment's range in the word columns
+#   word_starts      float32[words]
+#   word_ends        float32[words]
+#   word_char_starts uint32[words]       character span of the word in its segment's text
+#   word_char_ends   uint32[words]
+# Version 1 files have zeros where the word count now lives, so both read alike.
+MAGIC = b"SFTR"
+VERSION = 2
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sHHIQI4x")
+FLAG_BIG_ENDIAN = 0x1
+
+
+def write_columnar(path: Union[str, Path], transcript: List[Dict]):
+    """Write a transcript as a columnar .seg file (atomically)"""
+    starts = array("f", (float(segment.get("start", 0.0)) for segment in transcript))
+    ends = array("f", (float(segment.get("end", 0.0)) for segment in transcript))
+    offsets = array("I", [0])
+    blob = bytearray()
+    for segment in transcript:
+        blob += segment.get("text", "").encode("utf-8")
+        offsets.append(len(blob))
+
+    word_index = array("I", [0])
+    word_columns = (array("f"), array("f"), array("I"), array("I"))
+    for segment in transcript:
+        for word in segment.get("words") or ():
+            word_columns[0].append(float(word["start"]))
+            word_columns[1].append(float(word["end"]))
+            word_columns[2].append(word["char_start"])
+            word_columns[3].append(word["char_end"])
+        word_index.append(len(word_columns[0]))
+    word_count = len(word_columns[0])
+
+    flags = FLAG_BIG_ENDIAN if sys.byteorder == "big" else 0
+    path = Path(path)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, len(transcript), len(blob), word_count))
+        f.write(starts.tobytes())
+        f.write(ends.tobytes())
+        f.write(offsets.tobytes())
+        f.write(blob)
+        if word_count:
+            f.write(b"\0" * (-len(blob) % 4))
+            f.write(word_index.tobytes())
+            for column in word_columns:
+                f.write(column.tobytes())
+    os.replace(tmp_path, path)
+
+
+class ColumnarTranscript:
+    """Read-only, memory-mapped view of a .seg transcript.
+
+    Behaves like a list of {"start", "end", "text"} dicts (len, indexing,
+    slicing, iteration), but only the segments actually touched are turned
+    into dicts; start/end columns are exposed directly for binary search.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"Not a transcript file: {self.path}")
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, count, text_len, word_count = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported transcript file: {self.path}")
+        self._count = count
+        self.word_count = word_count
+
+        view = memoryview(self._buffer)
+        position = HEADER.size
+        starts = view[position:position + 4 * count]
+        position += 4 * count
+        ends = view[position:position + 4 * count]
+        position += 4 * count
+        offsets = view[position:position + 4 * (count + 1)]
+        position += 4 * (count + 1)
+        self._text = view[position:position + text_len]
+        position += text_len + (-text_len % 4)
+
+        columns = [("f", starts), ("f", ends), ("I", offsets)]
+        if word_count:
+            for typecode, length in (("I", count + 1), ("f", word_count), ("f", word_count),
+                                     ("I", word_count), ("I", word_count)):
+                columns.append((typecode, view[position:position + 4 * length]))
+                position += 4 * length
+
+        if bool(flags & FLAG_BIG_ENDIAN) == (sys.byteorder == "big"):
+            # Zero-copy: the columns are views straight into the mapping
+            columns = [raw.cast(typecode) for typecode, raw in columns]
+        else:
+            columns = [self._swapped(typecode, raw) for typecode, raw in columns]
+        self.starts, self.ends, self._offsets = columns[:3]
+        self._word_columns = columns[3:]
+
+    @staticmethod
+    def _swapped(typecode: str, raw: memoryview) -> array:
+        values = array(typecode)
+        values.frombytes(raw.tobytes())
+        values.byteswap()
+        return values
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def text(self, index: int) -> str:
+        """Decode a single segment's text"""
+        return bytes(self._text[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+    def words(self, index: int) -> List[Dict]:
+        """Word timings stored for a segment (empty if none were recorded)"""
+        if not self._word_columns:
+            return []
+        word_index, word_starts, word_ends, char_starts, char_ends = self._word_columns
+        return [
+            {
+                "start": round(word_starts[i], 3),
+                "end": round(word_ends[i], 3),
+                "char_start": char_starts[i],
+                "char_end": char_ends[i]
+            }
+            for i in range(word_index[index], word_index[index + 1])
+        ]
+
+    def segment(self, index: int) -> Dict:
+        # float32 columns: round back to the millisecond precision we store
+        return {
+            "start": round(self.starts[index], 3),
+            "end": round(self.ends[index], 3),
+            "text": self.text(index)
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.segment(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("segment index out of range")
+        return self.segment(index)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self.segment(index)
+
+    def to_list(self) -> List[Dict]:
+        """Materialise every segment (the JSON export used by the API)"""
+        return [self.segment(i) for i in range(self._count)]
+
+    def __enter__(self) -> "ColumnarTranscript":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Views must be released before the mapping can be closed
+        columns = [getattr(self, name, None) for name in ("starts", "ends", "_offsets", "_text")]
+        for column in columns + list(getattr(self, "_word_columns", ())):
+            if isinstance(column, memoryview):
+                column.release()
+        self._buffer.close()
+
+
+def time_window(starts: Sequence[float], ends: Sequence[float],
+                from_time: Optional[float] = None, to_time: Optional[float] = None) -> Tuple[int, int]:
+    """Index range [lo, hi) of segments overlapping [from_time, to_time).
+
+    Segments are ordered by start time, so both bounds are binary searches
+    over the start column; only the segment straddling from_time needs its
+    end checked.
+    """
+    lo, hi = 0, len(starts)
+    if from_time is not None:
+        lo = max(bisect.bisect_right(starts, from_time) - 1, 0)
+        if lo < hi and ends[lo] <= from_time:
+            lo += 1
+    if to_time is not None:
+        hi = max(bisect.bisect_left(starts, to_time), lo)
+    return lo, hi
+
+
+def open_columnar(path: Union[str, Path]) -> Optional[ColumnarTranscript]:
+    """Open a .seg file, or return None if it is missing or unreadable"""
+    try:
+        return ColumnarTranscript(path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def migrate_transcript(json_path: Union[str, Path], keep_json: bool = False) -> Path:
+    """Convert a legacy list-of-dicts JSON transcript into a .seg file next to it"""
+    json_path = Path(json_path)
+    transcript = read_json(json_path)
+    
+    seg_path = json_path.with_suffix(".seg")
+    write_columnar(seg_path, transcript)
+    if not keep_json:
+        os.remove(json_path)
+    return seg_path
@@ -0,0 +1,81 @@
+import bisect
+import re
+from typing import List, Dict, Optional, Tuple
+
+
+# Words are stored as {"start", "end", "char_start", "char_end"}: times on the
+# transcript timeline and the word's character span in its segment's text.
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def align_words(text: str, words: List[Dict]) -> List[Dict]:
+    """Attach character spans to recognised words by finding them, in order, in the segment text.
+
+    words are {"word", "start", "end"} as returned by the transcription API.
+    Words that can't be located (e.g. normalised differently) are dropped.
+    """
+    text_lower = text.lower()
+    aligned = []
+    cursor = 0
+    for word in words:
+        token = str(word.get("word", "")).strip().lower()
+        position = text_lower.find(token, cursor) if token else -1
+        if position == -1:
+            # Punctuation attached differently in the word list than in the text
+            token = token.strip(".,!?;:\"'()[]")
+            position = text_lower.find(token, cursor) if token else -1
+        if position == -1:
+            continue
+        cursor = position + len(token)
+        aligned.append({
+            "start": float(word.get("start", 0.0)),
+            "end": float(word.get("end", 0.0)),
+            "char_start": position,
+            "char_end": cursor
+        })
+    return aligned
+
+
+def interpolate_words(start: float, end: float, text: str) -> List[Dict]:
+    """Estimate word times by spreading the segment's duration over its characters"""
+    spans = [match.span() for match in WORD_PATTERN.finditer(text)]
+    if not spans:
+        return []
+    first = spans[0][0]
+    total = max(spans[-1][1] - first, 1)
+    duration = max(end - start, 0.0)
+    return [
+        {
+            "start": round(start + duration * (char_start - first) / total, 3),
+            "end": round(start + duration * (char_end - first) / total, 3),
+            "char_start": char_start,
+            "char_end": char_end
+        }
+        for char_start, char_end in spans
+    ]
+
+
+def assign_words(segments: List[Dict], words: List[Dict]):
+    """Distribute a flat, time-ordered word list over segments by each word's midpoint"""
+    if not segments or not words:
+        return
+    starts = [segment["start"] for segment in segments]
+    grouped: List[List[Dict]] = [[] for _ in segments]
+    for word in words:
+        midpoint = (float(word.get("start", 0.0)) + float(word.get("end", 0.0))) / 2
+        segment_idx = max(bisect.bisect_right(starts, midpoint) - 1, 0)
+        grouped[segment_idx].append(word)
+    for segment, segment_words in zip(segments, grouped):
+        aligned = align_words(segment["text"], segment_words)
+        if aligned:
+            segment["words"] = aligned
+
+
+def hit_times(words: List[Dict], char_start: int, char_end: int) -> Optional[Tuple[float, float]]:
+    """(start, end) time of the words covering text[char_start:char_end], if any"""
+    if not words:
+        return None
+    word_starts = [word["char_start"] for word in words]
+    first = max(bisect.bisect_right(word_starts, char_start) - 1, 0)
+    last = max(bisect.bisect_left(word_starts, char_end) - 1, first)
+    return words[first]["start"], words[last]["end"]
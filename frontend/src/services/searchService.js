@@ -1,14 +1,44 @@
 import apiClient from '../api/client'
 
 export const searchService = {
-  async searchKeyword(keyword, videoId) {
+  async searchKeyword(keyword, videoId, { fuzzy = false, maxEdits } = {}) {
     const response = await apiClient.get('/search', {
       params: {
         keyword,
         video_id: videoId,
+        fuzzy: fuzzy || undefined,
+        max_edits: maxEdits,
       },
     })
     return response.data
   },
-}
 
+  async searchKeywords(keywords, videoId) {
+    const response = await apiClient.get('/search', {
+      params: {
+        keywords,
+        video_id: videoId,
+      },
+      // Repeat the key (keywords=a&keywords=b) the way FastAPI expects lists
+      paramsSerializer: { indexes: null },
+    })
+    return response.data
+  },
+
+  // Search while the transcript is still being transcribed; returns a function that stops listening
+  streamSearch(keyword, videoId, { onMatches, onDone, onError } = {}) {
+    const url = new URL('/search/stream', apiClient.defaults.baseURL)
+    url.search = new URLSearchParams({ keyword, video_id: videoId })
+    const source = new EventSource(url)
+    source.addEventListener('matches', (event) => onMatches?.(JSON.parse(event.data)))
+    source.addEventListener('done', (event) => {
+      source.close()
+      onDone?.(JSON.parse(event.data))
+    })
+    source.addEventListener('error', (event) => {
+      source.close()
+      onError?.(event.data ? JSON.parse(event.data) : { detail: 'Connection lost' })
+    })
+    return () => source.close()
+  },
+}
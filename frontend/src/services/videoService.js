@@ -23,5 +23,34 @@ export const videoService = {
     })
     return response.data.transcript
   },
-}
 
+  async getTranscriptWindow(videoId, { offset, limit, fromTime, toTime } = {}) {
+    const response = await apiClient.get('/transcript', {
+      params: {
+        video_id: videoId,
+        offset,
+        limit,
+        from_time: fromTime,
+        to_time: toTime,
+      },
+    })
+    return response.data
+  },
+
+  // Transcript segments as each chunk is transcribed; returns a function that stops listening
+  streamTranscript(videoId, { onSegments, onDone, onError } = {}) {
+    const url = new URL('/transcript/stream', apiClient.defaults.baseURL)
+    url.search = new URLSearchParams({ video_id: videoId })
+    const source = new EventSource(url)
+    source.addEventListener('segments', (event) => onSegments?.(JSON.parse(event.data)))
+    source.addEventListener('done', (event) => {
+      source.close()
+      onDone?.(JSON.parse(event.data))
+    })
+    source.addEventListener('error', (event) => {
+      source.close()
+      onError?.(event.data ? JSON.parse(event.data) : { detail: 'Connection lost' })
+    })
+    return () => source.close()
+  },
+}